@@ -1,50 +1,111 @@
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from pydantic import ValidationError
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.config import settings
+from app.core.cache import cache, USER_STATUS
+from app.core.security import decode_token_cached
+from app.core.tracing import span
 from app.models.user import User
-from app.schemas.user import TokenData
+from app.models.patient import Patient
+from app.models.doctor import Doctor
+from app.schemas.user import TokenData, PatientClaims, DoctorClaims
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login", auto_error=False)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def token_data_from(token: Optional[str]) -> TokenData:
+    with span("auth.decode_token"):
+        payload = decode_token_cached(token) if token else None
+    if payload is None:
+        raise _credentials_exception()
+
+    email = payload.get("sub")
+    user_id = payload.get("user_id")
+    if email is None or user_id is None:
+        raise _credentials_exception()
+
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
+        return TokenData(
+            email=email,
+            user_id=user_id,
+            role=payload.get("role"),
+            name=payload.get("name"),
+            patient_id=payload.get("patient_id"),
+            doctor_id=payload.get("doctor_id"),
         )
-        email: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        
-        if email is None or user_id is None:
-            raise credentials_exception
-            
-        token_data = TokenData(email=email, user_id=user_id)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == token_data.email).first()
-    
+    except ValidationError:
+        raise _credentials_exception()
+
+
+def ensure_active_user(user_id, db: Optional[Session] = None) -> None:
+    """Reject tokens whose account was deleted or deactivated since login.
+
+    The flag is cached per user for USER_STATUS_CACHE_TTL seconds and
+    evicted on every committed User change, so most requests skip the
+    query. Without ``db`` a short-lived session is opened on a miss.
+    """
+    def load():
+        with span("auth.check_active"):
+            if db is not None:
+                return db.query(User.is_active).filter(User.id == user_id).scalar()
+            with SessionLocal() as session:
+                return session.query(User.is_active).filter(User.id == user_id).scalar()
+
+    active = cache.get_or_load(USER_STATUS, user_id, load, ttl=settings.USER_STATUS_CACHE_TTL)
+    if active is None:
+        raise _credentials_exception()
+
+    if not active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+
+def active_token_data_from(token: Optional[str]) -> TokenData:
+    """token_data_from plus the liveness check, for callers without a session."""
+    token_data = token_data_from(token)
+    ensure_active_user(token_data.user_id)
+    return token_data
+
+
+def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
+    return token_data_from(token)
+
+
+def get_stream_token_data(
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers")
+) -> TokenData:
+    """Like get_token_data, but also accepts ``?token=`` because browser
+    EventSource connections cannot send an Authorization header."""
+    return active_token_data_from(header_token or token)
+
+
+def get_current_user(
+    token_data: TokenData = Depends(get_token_data),
+    db: Session = Depends(get_db)
+) -> User:
+    with span("auth.load_user"):
+        user = db.query(User).filter(User.id == token_data.user_id).first()
+
     if user is None:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    
+
     return user
 
 
@@ -68,3 +129,75 @@ def get_current_doctor(
             detail="Not authorized to access this resource"
         )
     return current_user
+
+
+def _load_profile(db: Session, model, user_id, label: str):
+    with span("auth.load_profile", role=label.lower()):
+        row = db.query(model.id, User.first_name, User.last_name).join(
+            User, model.user_id == User.id
+        ).filter(model.user_id == user_id).first()
+
+    if row is None:
+        return None, None
+    return row.id, f"{row.first_name} {row.last_name}"
+
+
+def get_profile_claims(
+    token_data: TokenData = Depends(get_token_data),
+    db: Session = Depends(get_db)
+) -> TokenData:
+    """Return the caller's claims with their profile id.
+
+    Profile ids come from the token; only the account's ``is_active`` flag
+    is checked, usually from cache. Tokens issued before profile ids were
+    embedded fall back to a single lookup; a user without a profile gets
+    claims with no profile id.
+    """
+    ensure_active_user(token_data.user_id, db)
+
+    if token_data.role == "patient" and (token_data.patient_id is None or token_data.name is None):
+        patient_id, name = _load_profile(db, Patient, token_data.user_id, "Patient")
+        return token_data.model_copy(update={"patient_id": patient_id, "name": name})
+
+    if token_data.role == "doctor" and (token_data.doctor_id is None or token_data.name is None):
+        doctor_id, name = _load_profile(db, Doctor, token_data.user_id, "Doctor")
+        return token_data.model_copy(update={"doctor_id": doctor_id, "name": name})
+
+    return token_data
+
+
+def get_patient_claims(
+    claims: TokenData = Depends(get_profile_claims)
+) -> PatientClaims:
+    if claims.role != "patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this resource"
+        )
+    if claims.patient_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found"
+        )
+    return PatientClaims(**claims.model_dump())
+
+
+def get_doctor_claims(
+    claims: TokenData = Depends(get_profile_claims)
+) -> DoctorClaims:
+    if claims.role != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this resource"
+        )
+    if claims.doctor_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor profile not found"
+        )
+    return DoctorClaims(**claims.model_dump())
+
+
+CurrentClaims = Annotated[TokenData, Depends(get_profile_claims)]
+CurrentPatient = Annotated[PatientClaims, Depends(get_patient_claims)]
+CurrentDoctor = Annotated[DoctorClaims, Depends(get_doctor_claims)]
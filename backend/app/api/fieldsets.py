@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+class Projection:
+    """Maps the public fields of a list response to SQL expressions.
+
+    Each field names the column expression that produces it and the joins
+    that expression needs, so a ``?fields=`` request selects only those
+    columns and only joins the tables they live in.
+    """
+
+    def __init__(self, fields: Dict[str, Tuple[object, Tuple[str, ...]]], required: Tuple[str, ...] = ("id",)):
+        self.fields = fields
+        self.required = required
+
+    def select(self, fields_param: Optional[str]) -> List[str]:
+        if not fields_param:
+            return list(self.fields)
+
+        requested = [name.strip() for name in fields_param.split(",") if name.strip()]
+        unknown = sorted({name for name in requested if name not in self.fields})
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(self.fields)}"
+            )
+
+        names = []
+        for name in (*self.required, *requested):
+            if name not in names:
+                names.append(name)
+        return names
+
+    def columns(self, names: Iterable[str]) -> list:
+        return [self.fields[name][0].label(name) for name in names]
+
+    def joins(self, names: Iterable[str]) -> Set[str]:
+        needed = set()
+        for name in names:
+            needed.update(self.fields[name][1])
+        return needed
+
+
+def rows_to_dicts(rows, names: List[str]) -> List[dict]:
+    return [{name: row._mapping[name] for name in names} for row in rows]
+
+
+def sparse_response(items: List[dict]) -> JSONResponse:
+    """Bypass the full response model so the payload carries only the
+    requested keys."""
+    return JSONResponse(jsonable_encoder(items))
@@ -1,16 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, time as dt_time
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 
-from app.database import get_db
+from app.database import get_db, release_connection
 from app.models.user import User
 from app.models.patient import Patient
 from app.models.doctor import Doctor
 from app.models.appointment import Appointment
 from app.models.availability import Availability
-from app.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse
-from app.api.deps import get_current_user
+from app.schemas.appointment import (
+    AppointmentCreate,
+    AppointmentUpdate,
+    AppointmentResponse,
+    AppointmentBulkStatusUpdate,
+    AppointmentBulkStatusResponse,
+    AppointmentStatusResult,
+)
+from app.schemas.user import TokenData
+from app.api.deps import CurrentClaims, CurrentDoctor, CurrentPatient
+from app.api.fieldsets import Projection, rows_to_dicts, sparse_response
+from app.core.events import publish_event
+from app.services.appointment_service import (
+    ACTIVE_STATUSES,
+    STATUS_TRANSITIONS,
+    appointment_event,
+    bulk_transition,
+    held_slots,
+    overlapping_appointments,
+    resolve_duration,
+)
+from app.services.waitlist_service import offer_freed_appointment
 
 router = APIRouter()
 
@@ -18,22 +40,9 @@ router = APIRouter()
 @router.post("", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 def book_appointment(
     appointment_data: AppointmentCreate,
-    current_user: User = Depends(get_current_user),
+    patient: CurrentPatient,
     db: Session = Depends(get_db)
 ):
-    if current_user.role != "patient":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only patients can book appointments"
-        )
-    
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Patient profile not found"
-        )
-    
     doctor = db.query(Doctor).filter(Doctor.id == appointment_data.doctor_id).first()
     if not doctor:
         raise HTTPException(
@@ -41,31 +50,32 @@ def book_appointment(
             detail="Doctor not found"
         )
     
-    # Validate appointment is within doctor's availability
+    duration = resolve_duration(doctor)
+    start = datetime.combine(appointment_data.date, appointment_data.time)
+    end = start + timedelta(minutes=duration)
+    
+    # Validate the whole appointment fits within one of the doctor's availability windows
     day_of_week = appointment_data.date.strftime('%A').lower()
     appointment_time = appointment_data.time
     
-    available_slot = db.query(Availability).filter(
-        Availability.doctor_id == doctor.id,
-        Availability.day_of_week == day_of_week,
-        Availability.is_available == True,
-        Availability.start_time <= appointment_time,
-        Availability.end_time > appointment_time
-    ).first()
+    available_slot = None
+    if end.date() == start.date():
+        available_slot = db.query(Availability).filter(
+            Availability.doctor_id == doctor.id,
+            Availability.day_of_week == day_of_week,
+            Availability.is_available == True,
+            Availability.start_time <= appointment_time,
+            Availability.end_time >= end.time()
+        ).first()
     
     if not available_slot:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Doctor is not available on {day_of_week} at {appointment_time}. Please choose a time within their available hours."
+            detail=f"Doctor is not available on {day_of_week} at {appointment_time} for {duration} minutes. Please choose a time within their available hours."
         )
     
-    # Check for conflicting appointments
-    existing_appointment = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor.id,
-        Appointment.date == appointment_data.date,
-        Appointment.time == appointment_data.time,
-        Appointment.status.in_(["pending", "confirmed"])
-    ).first()
+    # Check for overlapping appointments, not just identical start times
+    existing_appointment = overlapping_appointments(db, [doctor.id], start, end).first()
     
     if existing_appointment:
         raise HTTPException(
@@ -73,17 +83,39 @@ def book_appointment(
             detail="This time slot is already booked. Please choose another time."
         )
     
+    held_for_others = [
+        hold for hold in held_slots(db, [doctor.id], start, end, datetime.utcnow())
+        if hold[1] != patient.patient_id
+    ]
+    if held_for_others:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This time slot is being offered to a patient on the waitlist. Please choose another time."
+        )
+    
     new_appointment = Appointment(
-        patient_id=patient.id,
+        patient_id=patient.patient_id,
         doctor_id=doctor.id,
         date=appointment_data.date,
         time=appointment_data.time,
+        duration_minutes=duration,
         reason=appointment_data.reason,
         status="pending"
     )
     
     db.add(new_appointment)
-    db.commit()
+    try:
+        # Flush first so the event carries the new id; it is only sent on commit
+        db.flush()
+        publish_event(db, [patient.user_id, doctor.user_id], appointment_event(new_appointment, "appointment.created"))
+        db.commit()
+    except IntegrityError:
+        # A concurrent booking won the race; the exclusion constraint caught it
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This time slot is already booked. Please choose another time."
+        )
     db.refresh(new_appointment)
     
     return AppointmentResponse(
@@ -93,79 +125,133 @@ def book_appointment(
         date=new_appointment.date,
         time=new_appointment.time,
         status=new_appointment.status,
+        duration_minutes=new_appointment.duration_minutes,
         reason=new_appointment.reason,
         notes=new_appointment.notes,
-        patient_name=current_user.full_name,
+        patient_name=patient.name,
         doctor_name=doctor.user.full_name,
         created_at=new_appointment.created_at
     )
 
 
+DoctorUser = aliased(User)
+PatientUser = aliased(User)
+
+APPOINTMENT_FIELDS = {
+    "id": (Appointment.id, ()),
+    "patient_id": (Appointment.patient_id, ()),
+    "doctor_id": (Appointment.doctor_id, ()),
+    "date": (Appointment.date, ()),
+    "time": (Appointment.time, ()),
+    "status": (Appointment.status, ()),
+    "duration_minutes": (Appointment.duration_minutes, ()),
+    "reason": (Appointment.reason, ()),
+    "notes": (Appointment.notes, ()),
+    "created_at": (Appointment.created_at, ()),
+}
+
+
+def appointment_projection(claims: TokenData) -> Projection:
+    # The caller's own name comes from the token; only the other party is joined
+    fields = dict(APPOINTMENT_FIELDS)
+    if claims.role == "patient":
+        fields["patient_name"] = (literal(claims.name), ())
+        fields["doctor_name"] = (DoctorUser.first_name + " " + DoctorUser.last_name, ("doctor_user",))
+    else:
+        fields["patient_name"] = (PatientUser.first_name + " " + PatientUser.last_name, ("patient_user",))
+        fields["doctor_name"] = (literal(claims.name), ())
+    return Projection(fields)
+
+
+def apply_appointment_joins(query, joins):
+    if "doctor_user" in joins:
+        query = query.join(Doctor, Appointment.doctor_id == Doctor.id).join(
+            DoctorUser, Doctor.user_id == DoctorUser.id
+        )
+    if "patient_user" in joins:
+        query = query.join(Patient, Appointment.patient_id == Patient.id).join(
+            PatientUser, Patient.user_id == PatientUser.id
+        )
+    return query
+
+
 @router.get("/my", response_model=List[AppointmentResponse])
 def get_my_appointments(
-    current_user: User = Depends(get_current_user),
+    claims: CurrentClaims,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    date_from: Optional[date] = Query(None, description="Only appointments on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only appointments on or before this date"),
     db: Session = Depends(get_db)
 ):
-    if current_user.role == "patient":
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient:
-            return []
-        
-        appointments = db.query(Appointment).filter(
-            Appointment.patient_id == patient.id
-        ).order_by(Appointment.date.desc(), Appointment.time.desc()).all()
-        
-        result = []
-        for apt in appointments:
-            result.append(AppointmentResponse(
-                id=apt.id,
-                patient_id=apt.patient_id,
-                doctor_id=apt.doctor_id,
-                date=apt.date,
-                time=apt.time,
-                status=apt.status,
-                reason=apt.reason,
-                notes=apt.notes,
-                patient_name=current_user.full_name,
-                doctor_name=apt.doctor.user.full_name,
-                created_at=apt.created_at
-            ))
-        return result
-    
-    elif current_user.role == "doctor":
-        doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
-        if not doctor:
-            return []
-        
-        appointments = db.query(Appointment).filter(
-            Appointment.doctor_id == doctor.id
-        ).order_by(Appointment.date.desc(), Appointment.time.desc()).all()
-        
-        result = []
-        for apt in appointments:
-            result.append(AppointmentResponse(
-                id=apt.id,
-                patient_id=apt.patient_id,
-                doctor_id=apt.doctor_id,
-                date=apt.date,
-                time=apt.time,
-                status=apt.status,
-                reason=apt.reason,
-                notes=apt.notes,
-                patient_name=apt.patient.user.full_name,
-                doctor_name=current_user.full_name,
-                created_at=apt.created_at
-            ))
-        return result
-    
-    return []
+    if claims.role == "patient" and claims.patient_id is not None:
+        owner_filter = Appointment.patient_id == claims.patient_id
+    elif claims.role == "doctor" and claims.doctor_id is not None:
+        owner_filter = Appointment.doctor_id == claims.doctor_id
+    else:
+        return []
+    
+    projection = appointment_projection(claims)
+    names = projection.select(fields)
+    
+    query = db.query(*projection.columns(names)).select_from(Appointment)
+    query = apply_appointment_joins(query, projection.joins(names))
+    query = query.filter(owner_filter)
+    # Date bounds prune the monthly partitions outside the range
+    if date_from is not None:
+        query = query.filter(Appointment.date >= date_from)
+    if date_to is not None:
+        query = query.filter(Appointment.date <= date_to)
+    rows = query.order_by(Appointment.date.desc(), Appointment.time.desc()).all()
+    
+    items = rows_to_dicts(rows, names)
+    release_connection(db)
+    if fields:
+        return sparse_response(items)
+    return items
+
+
+@router.patch("/status", response_model=AppointmentBulkStatusResponse)
+def bulk_update_appointment_status(
+    update: AppointmentBulkStatusUpdate,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
+    """Confirm, complete or cancel many of the doctor's appointments at once.
+
+    Ids that are unknown, belong to another doctor, or can't make the
+    transition from their current status are reported and left unchanged.
+    """
+    if update.status not in STATUS_TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"status must be one of: {', '.join(STATUS_TRANSITIONS)}"
+        )
+    
+    ids = list(dict.fromkeys(update.ids))
+    updated, rejected = bulk_transition(db, doctor.doctor_id, ids, update.status)
+    now = datetime.utcnow()
+    for row in updated:
+        publish_event(db, [row.patient_user_id, doctor.user_id], appointment_event(row, "appointment.updated"))
+        if update.status == "cancelled":
+            offer_freed_appointment(db, row, now)
+    db.commit()
+    
+    results = []
+    for appointment_id in ids:
+        if appointment_id in rejected:
+            reason, current = rejected[appointment_id]
+            results.append(AppointmentStatusResult(id=appointment_id, result=reason, status=current))
+        else:
+            results.append(AppointmentStatusResult(id=appointment_id, result="updated", status=update.status))
+    
+    return AppointmentBulkStatusResponse(updated=len(updated), results=results)
 
 
 @router.patch("/{appointment_id}/status", response_model=AppointmentResponse)
 def update_appointment_status(
     appointment_id: int,
     status_update: AppointmentUpdate,
-    current_user: User = Depends(get_current_user),
+    claims: CurrentClaims,
     db: Session = Depends(get_db)
 ):
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -176,28 +262,44 @@ def update_appointment_status(
             detail="Appointment not found"
         )
     
-    if current_user.role == "doctor":
-        doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
-        if not doctor or appointment.doctor_id != doctor.id:
+    if claims.role == "doctor":
+        if appointment.doctor_id != claims.doctor_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to update this appointment"
             )
-    elif current_user.role == "patient":
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or appointment.patient_id != patient.id:
+    elif claims.role == "patient":
+        if appointment.patient_id != claims.patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to update this appointment"
             )
     
+    freed = appointment.status in ACTIVE_STATUSES and status_update.status == "cancelled"
     if status_update.status:
         appointment.status = status_update.status
     if status_update.notes:
         appointment.notes = status_update.notes
     
     appointment.updated_at = datetime.utcnow()
-    db.commit()
+    try:
+        db.flush()
+        publish_event(
+            db,
+            [appointment.patient.user_id, appointment.doctor.user_id],
+            appointment_event(appointment, "appointment.updated")
+        )
+        if freed:
+            # Offered to the next waitlisted patient in the same transaction
+            offer_freed_appointment(db, appointment, appointment.updated_at)
+        db.commit()
+    except IntegrityError:
+        # Re-activating a cancelled appointment whose slot has since been taken
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This time slot is already booked. Please choose another time."
+        )
     db.refresh(appointment)
     
     return AppointmentResponse(
@@ -207,6 +309,7 @@ def update_appointment_status(
         date=appointment.date,
         time=appointment.time,
         status=appointment.status,
+        duration_minutes=appointment.duration_minutes,
         reason=appointment.reason,
         notes=appointment.notes,
         patient_name=appointment.patient.user.full_name,
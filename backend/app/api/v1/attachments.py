@@ -0,0 +1,193 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List
+
+from app.config import settings
+from app.database import get_db, release_connection
+from app.models.medical_record import MedicalRecord
+from app.models.attachment import Attachment
+from app.schemas.attachment import AttachmentResponse
+from app.schemas.user import TokenData
+from app.api.deps import CurrentClaims, CurrentDoctor
+from app.core.object_store import ContentAddressedStore, ObjectTooLarge
+from app.core.range_response import RangeFileResponse
+from app.services.audit_service import record_access
+
+router = APIRouter()
+
+store = ContentAddressedStore(settings.ATTACHMENT_STORAGE_DIR)
+
+
+def get_readable_record(db: Session, record_id: int, claims: TokenData) -> MedicalRecord:
+    record = db.query(MedicalRecord).filter(MedicalRecord.id == record_id).first()
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Medical record not found"
+        )
+
+    is_owner = claims.role == "patient" and record.patient_id == claims.patient_id
+    is_author = claims.role == "doctor" and record.doctor_id == claims.doctor_id
+    if not (is_owner or is_author):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this medical record"
+        )
+    return record
+
+
+def save_attachment_metadata(
+    db: Session, record: MedicalRecord, digest: str, size: int, content_type: str, filename: str, user_id
+) -> Attachment:
+    # Re-uploading the same file to the same record returns the existing row
+    existing = db.query(Attachment).filter(
+        Attachment.medical_record_id == record.id,
+        Attachment.sha256 == digest
+    ).first()
+    if existing:
+        return existing
+
+    attachment = Attachment(
+        medical_record_id=record.id,
+        sha256=digest,
+        size_bytes=size,
+        content_type=content_type,
+        filename=filename,
+        uploaded_by=user_id
+    )
+    db.add(attachment)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return db.query(Attachment).filter(
+            Attachment.medical_record_id == record.id,
+            Attachment.sha256 == digest
+        ).one()
+    db.refresh(attachment)
+    return attachment
+
+
+@router.post("/{record_id}/attachments", response_model=AttachmentResponse, status_code=status.HTTP_201_CREATED)
+async def upload_attachment(
+    record_id: int,
+    request: Request,
+    doctor: CurrentDoctor,
+    filename: str = Query(..., min_length=1, max_length=255),
+    db: Session = Depends(get_db)
+):
+    """Attach a file to a medical record.
+
+    The file is sent as the raw request body with its own Content-Type; it is
+    streamed to disk in chunks and never held in memory.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in settings.ATTACHMENT_ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported attachment type: {content_type or 'none'}"
+        )
+
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > settings.ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Attachment is too large"
+        )
+
+    record = await run_in_threadpool(get_readable_record, db, record_id, doctor)
+    if record.doctor_id != doctor.doctor_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the authoring doctor can add attachments"
+        )
+    # The upload can take minutes; don't pin a pool connection meanwhile
+    await run_in_threadpool(release_connection, db)
+
+    try:
+        digest, size = await store.save_stream(request.stream(), settings.ATTACHMENT_MAX_BYTES)
+    except ObjectTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Attachment is too large"
+        )
+
+    if size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attachment is empty"
+        )
+
+    return await run_in_threadpool(
+        save_attachment_metadata, db, record, digest, size, content_type, filename, doctor.user_id
+    )
+
+
+@router.get("/{record_id}/attachments", response_model=List[AttachmentResponse])
+def list_attachments(
+    record_id: int,
+    claims: CurrentClaims,
+    db: Session = Depends(get_db)
+):
+    get_readable_record(db, record_id, claims)
+
+    return db.query(Attachment).filter(
+        Attachment.medical_record_id == record_id
+    ).order_by(Attachment.created_at, Attachment.id).all()
+
+
+@router.get("/{record_id}/attachments/{attachment_id}")
+def download_attachment(
+    record_id: int,
+    attachment_id: int,
+    request: Request,
+    claims: CurrentClaims,
+    db: Session = Depends(get_db)
+):
+    record = get_readable_record(db, record_id, claims)
+
+    attachment = db.query(Attachment).filter(
+        Attachment.id == attachment_id,
+        Attachment.medical_record_id == record_id
+    ).first()
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+
+    path = store.path_for(attachment.sha256)
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment content is missing"
+        )
+
+    record_access(
+        "download",
+        "medical_record_attachment",
+        actor_user_id=claims.user_id,
+        actor_role=claims.role,
+        patient_id=record.patient_id,
+        resource_id=str(attachment.id),
+        ip_address=request.client.host if request.client else None,
+    )
+
+    release_connection(db)
+
+    # Only honour Range if the client's cached copy is still this content
+    etag = f'"{attachment.sha256}"'
+    range_header = request.headers.get("range")
+    if request.headers.get("if-range", etag) != etag:
+        range_header = None
+
+    return RangeFileResponse(
+        str(path),
+        attachment.size_bytes,
+        attachment.content_type,
+        range_header=range_header,
+        filename=attachment.filename,
+        etag=attachment.sha256
+    )
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import timedelta
+import math
 
-from app.database import get_db
+from app.database import get_db, release_connection
 from app.models.user import User
 from app.models.patient import Patient
 from app.models.doctor import Doctor
 from app.models.specialization import Specialization
 from app.schemas.user import UserCreate, UserResponse, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password, verify_password, verify_dummy_password, create_access_token
+from app.core.rate_limit import login_rate_limiter
+from app.core.cache import cache, SPECIALIZATION_BY_NAME
+from app.core import geohash
 from app.config import settings
 from app.api.deps import get_current_user
 
@@ -41,6 +45,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
                 detail="License number already registered"
             )
     
+    # Don't hold a pool connection through bcrypt
+    release_connection(db)
     hashed_pwd = hash_password(user_data.password)
     
     new_user = User(
@@ -61,13 +67,19 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         db.add(new_patient)
         db.commit()
     elif user_data.role == "doctor":
-        specialization = None
+        specialization_id = None
         if user_data.specialization:
-            specialization = db.query(Specialization).filter(
-                Specialization.name.ilike(user_data.specialization)
-            ).first()
+            def load_specialization_id():
+                row = db.query(Specialization.id).filter(
+                    Specialization.name.ilike(user_data.specialization)
+                ).first()
+                return row.id if row else None
             
-            if not specialization:
+            specialization_id = cache.get_or_load(
+                SPECIALIZATION_BY_NAME, user_data.specialization.lower(), load_specialization_id
+            )
+            
+            if specialization_id is None:
                 specialization = Specialization(
                     name=user_data.specialization,
                     description=f"{user_data.specialization} specialist"
@@ -75,11 +87,12 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
                 db.add(specialization)
                 db.commit()
                 db.refresh(specialization)
+                specialization_id = specialization.id
         
         new_doctor = Doctor(
             user_id=new_user.id,
             license_number=user_data.license_number,
-            specialization_id=specialization.id if specialization else None
+            specialization_id=specialization_id
         )
         db.add(new_doctor)
         db.commit()
@@ -89,10 +102,29 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
+    # Reject before touching the database or doing any bcrypt work
+    if settings.LOGIN_RATE_LIMIT_ENABLED:
+        client_ip = request.client.host if request.client else None
+        retry_after = login_rate_limiter.check(client_ip, form_data.username)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts. Please try again later.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+    
+    # Load the profile ids too, then free the connection before bcrypt
+    user = db.query(User).options(
+        joinedload(User.patient), joinedload(User.doctor)
+    ).filter(User.email == form_data.username).first()
+    release_connection(db)
+    
+    if not user:
+        verify_dummy_password(form_data.password)
     
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
@@ -108,8 +140,15 @@ def login(
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Profile ids ride along in the token so role-specific routes need no lookup
+    claims = {"sub": user.email, "user_id": str(user.id), "role": user.role, "name": user.full_name}
+    if user.role == "patient" and user.patient:
+        claims["patient_id"] = str(user.patient.id)
+    elif user.role == "doctor" and user.doctor:
+        claims["doctor_id"] = str(user.doctor.id)
+    
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": str(user.id), "role": user.role},
+        data=claims,
         expires_delta=access_token_expires
     )
     
@@ -156,6 +195,9 @@ def get_profile(current_user: User = Depends(get_current_user), db: Session = De
             profile_data.update({
                 "phone": doctor.phone,
                 "bio": doctor.bio,
+                "appointment_duration_minutes": doctor.appointment_duration_minutes,
+                "clinic_latitude": doctor.clinic_latitude,
+                "clinic_longitude": doctor.clinic_longitude,
             })
     
     return profile_data
@@ -197,6 +239,32 @@ def update_profile(
                 doctor.phone = profile_data["phone"]
             if "bio" in profile_data:
                 doctor.bio = profile_data["bio"]
+            if "appointment_duration_minutes" in profile_data:
+                duration = profile_data["appointment_duration_minutes"]
+                if duration is not None and (not isinstance(duration, int) or duration <= 0):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Appointment duration must be a positive number of minutes"
+                    )
+                doctor.appointment_duration_minutes = duration
+            if "clinic_latitude" in profile_data or "clinic_longitude" in profile_data:
+                latitude = profile_data.get("clinic_latitude", doctor.clinic_latitude)
+                longitude = profile_data.get("clinic_longitude", doctor.clinic_longitude)
+                if latitude is None or longitude is None:
+                    doctor.clinic_latitude = doctor.clinic_longitude = doctor.clinic_geohash = None
+                else:
+                    try:
+                        latitude, longitude = float(latitude), float(longitude)
+                    except (TypeError, ValueError):
+                        latitude = longitude = None
+                    if latitude is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid clinic coordinates"
+                        )
+                    doctor.clinic_latitude = latitude
+                    doctor.clinic_longitude = longitude
+                    doctor.clinic_geohash = geohash.encode(latitude, longitude)
     
     db.commit()
     db.refresh(current_user)
@@ -219,6 +287,8 @@ def change_password(
             detail="Current password and new password are required"
         )
     
+    release_connection(db)
+    
     # Verify current password
     if not verify_password(current_password, current_user.hashed_password):
         raise HTTPException(
@@ -235,6 +305,7 @@ def change_password(
     
     # Update password
     current_user.hashed_password = hash_password(new_password)
+    db.add(current_user)
     db.commit()
     
     return {"message": "Password changed successfully"}
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.database import get_db
-from app.models.user import User
+from app.config import settings
 from app.models.doctor import Doctor
 from app.models.availability import Availability
-from app.api.deps import get_current_doctor
+from app.api.deps import CurrentDoctor
+from app.core.cache import cache, DOCTOR_AVAILABILITY
+from app.services.appointment_service import find_free_slots
 from pydantic import BaseModel, field_serializer
-from datetime import time
+from datetime import date, datetime, time
 
 router = APIRouter()
 
@@ -36,20 +38,19 @@ class AvailabilityResponse(BaseModel):
         from_attributes = True
 
 
+class SlotResponse(BaseModel):
+    date: date
+    time: time
+    duration_minutes: int
+
+
 @router.get("/my", response_model=List[AvailabilityResponse])
 def get_my_availability(
-    current_user: User = Depends(get_current_doctor),
+    doctor: CurrentDoctor,
     db: Session = Depends(get_db)
 ):
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor profile not found"
-        )
-    
     availability_slots = db.query(Availability).filter(
-        Availability.doctor_id == doctor.id
+        Availability.doctor_id == doctor.doctor_id
     ).order_by(Availability.day_of_week).all()
     
     return availability_slots
@@ -60,7 +61,6 @@ def get_doctor_availability(
     doctor_id: str,
     db: Session = Depends(get_db)
 ):
-    from uuid import UUID
     try:
         doctor_uuid = UUID(doctor_id)
     except ValueError:
@@ -69,27 +69,53 @@ def get_doctor_availability(
             detail="Invalid doctor ID format"
         )
     
-    availability_slots = db.query(Availability).filter(
-        Availability.doctor_id == doctor_uuid,
-        Availability.is_available == True
-    ).order_by(Availability.day_of_week).all()
+    def load():
+        availability_slots = db.query(Availability).filter(
+            Availability.doctor_id == doctor_uuid,
+            Availability.is_available == True
+        ).order_by(Availability.day_of_week).all()
+        return [AvailabilityResponse.model_validate(slot) for slot in availability_slots]
     
-    return availability_slots
+    return cache.get_or_load(DOCTOR_AVAILABILITY, doctor_uuid, load)
 
 
-@router.post("", response_model=AvailabilityResponse, status_code=status.HTTP_201_CREATED)
-def add_availability(
-    availability_data: AvailabilityCreate,
-    current_user: User = Depends(get_current_doctor),
+@router.get("/doctor/{doctor_id}/slots", response_model=List[SlotResponse])
+def get_doctor_free_slots(
+    doctor_id: str,
+    start: Optional[date] = Query(None),
+    days: int = Query(14, ge=1, le=settings.SLOT_SEARCH_MAX_DAYS),
     db: Session = Depends(get_db)
 ):
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    try:
+        doctor_uuid = UUID(doctor_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid doctor ID format"
+        )
+    
+    doctor = db.query(Doctor).filter(Doctor.id == doctor_uuid).first()
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor profile not found"
+            detail="Doctor not found"
         )
     
+    now = datetime.now()
+    slots = find_free_slots(db, doctor, start or now.date(), days, not_before=now)
+    
+    return [
+        SlotResponse(date=slot_start.date(), time=slot_start.time(), duration_minutes=duration)
+        for slot_start, duration in slots
+    ]
+
+
+@router.post("", response_model=AvailabilityResponse, status_code=status.HTTP_201_CREATED)
+def add_availability(
+    availability_data: AvailabilityCreate,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
     if availability_data.start_time >= availability_data.end_time:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -97,7 +123,7 @@ def add_availability(
         )
     
     new_availability = Availability(
-        doctor_id=doctor.id,
+        doctor_id=doctor.doctor_id,
         day_of_week=availability_data.day_of_week.lower(),
         start_time=availability_data.start_time,
         end_time=availability_data.end_time,
@@ -114,19 +140,12 @@ def add_availability(
 @router.delete("/{availability_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_availability(
     availability_id: int,
-    current_user: User = Depends(get_current_doctor),
+    doctor: CurrentDoctor,
     db: Session = Depends(get_db)
 ):
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor profile not found"
-        )
-    
     availability = db.query(Availability).filter(
         Availability.id == availability_id,
-        Availability.doctor_id == doctor.id
+        Availability.doctor_id == doctor.doctor_id
     ).first()
     
     if not availability:
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from app.config import settings
+from app.database import SessionLocal
+from app.core.idempotency import is_idempotent_route
+from app.schemas.batch import BatchItem, BatchItemResult, BatchRequest, BatchResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+READ_METHODS = {"GET", "HEAD"}
+ALLOWED_METHODS = READ_METHODS | {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class SessionLanes:
+    """A few sessions shared by every sub-request of a batch.
+
+    A Session must not be used by two threads at once, so each sub-request
+    borrows one lane for its duration. Concurrent reads therefore use at
+    most ``size`` connections for the whole batch, and sequential items
+    keep reusing the same one.
+
+    The first lane runs under the batch request's own admission slot; each
+    further lane needs a free slot from ``admission``, so under load a
+    batch runs its reads one at a time instead of bypassing the gate.
+    """
+
+    def __init__(self, size: int, admission=None):
+        self.size = max(1, size)
+        self.admission = admission
+        self._free: asyncio.Queue = asyncio.Queue()
+        self._sessions: List[Session] = []
+        self._extra_slots = 0
+
+    def _can_grow(self) -> bool:
+        if len(self._sessions) >= self.size:
+            return False
+        if not self._sessions or self.admission is None:
+            return True
+        if self.admission.try_acquire():
+            self._extra_slots += 1
+            return True
+        return False
+
+    async def acquire(self) -> Session:
+        if self._free.empty() and self._can_grow():
+            session = SessionLocal()
+            self._sessions.append(session)
+            return session
+        return await self._free.get()
+
+    def release(self, session: Session) -> None:
+        self._free.put_nowait(session)
+
+    def close(self) -> None:
+        for session in self._sessions:
+            session.close()
+
+    def release_admission(self) -> None:
+        for _ in range(self._extra_slots):
+            self.admission.release()
+        self._extra_slots = 0
+
+
+def check_item(item: BatchItem) -> Optional[str]:
+    if item.method.upper() not in ALLOWED_METHODS:
+        return f"Method {item.method} is not allowed in a batch"
+    path = item.path.split("?", 1)[0]
+    if not path.startswith(settings.API_V1_PREFIX + "/"):
+        return f"Path must start with {settings.API_V1_PREFIX}/"
+    if path.rstrip("/") == f"{settings.API_V1_PREFIX}/batch":
+        return "Batches cannot be nested"
+    if is_idempotent_route(item.method.upper(), path):
+        # Sub-requests skip IdempotencyMiddleware, so retries would not be
+        # de-duplicated; these must be sent on their own
+        return f"{item.method.upper()} {path} is not allowed in a batch; send it with an Idempotency-Key instead"
+    return None
+
+
+async def dispatch(handler, parent: Request, item: BatchItem, session: Session) -> BatchItemResult:
+    """Run one sub-request through the app's router in-process."""
+    body = b"" if item.body is None else json.dumps(item.body, default=str).encode()
+    path, _, query_string = item.path.partition("?")
+    if item.query:
+        extra = urlencode(item.query, doseq=True)
+        query_string = f"{query_string}&{extra}" if query_string else extra
+
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    authorization = parent.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": item.method.upper(),
+        "scheme": parent.url.scheme,
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": headers,
+        "client": parent.scope.get("client"),
+        "server": parent.scope.get("server"),
+        "app": parent.scope.get("app"),
+        "state": {"db": session},
+    }
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response = {"status": 500, "content_type": "", "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    response["content_type"] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    try:
+        await handler(scope, receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+        return BatchItemResult(id=item.id, status=500, body={"detail": "Internal server error"})
+
+    raw = b"".join(response["chunks"])
+    if not raw:
+        payload = None
+    elif response["content_type"].startswith("application/json"):
+        payload = json.loads(raw)
+    else:
+        payload = raw.decode("utf-8", "replace")
+
+    return BatchItemResult(id=item.id, status=response["status"], body=payload)
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """Run several API calls in one round trip.
+
+    Every sub-request reuses the caller's Authorization header (already
+    verified tokens are served from the token cache) and a small set of
+    batch-owned DB sessions. Consecutive GETs run concurrently; anything
+    else runs alone, in order, so later items see earlier writes.
+    """
+    items = batch.requests
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_ITEMS} requests"
+        )
+
+    # The router plus exception handlers, without the outer middleware the
+    # batch request itself already went through
+    handler = ExceptionMiddleware(request.app.router, handlers=request.app.exception_handlers)
+    lanes = SessionLanes(settings.BATCH_READ_CONCURRENCY, getattr(request.app.state, "admission_controller", None))
+    results: List[Optional[BatchItemResult]] = [None] * len(items)
+
+    async def run(index: int):
+        item = items[index]
+        error = check_item(item)
+        if error:
+            results[index] = BatchItemResult(id=item.id, status=status.HTTP_400_BAD_REQUEST, body={"detail": error})
+            return
+
+        session = await lanes.acquire()
+        try:
+            result = await dispatch(handler, request, item, session)
+            if result.status >= 400:
+                # Don't let a failed item's pending changes leak into the next one
+                await run_in_threadpool(session.rollback)
+        finally:
+            lanes.release(session)
+        results[index] = result
+
+    try:
+        index = 0
+        while index < len(items):
+            if items[index].method.upper() in READ_METHODS:
+                end = index
+                while end < len(items) and items[end].method.upper() in READ_METHODS:
+                    end += 1
+                await asyncio.gather(*(run(i) for i in range(index, end)))
+                index = end
+            else:
+                await run(index)
+                index += 1
+    finally:
+        lanes.release_admission()
+        await run_in_threadpool(lanes.close)
+
+    return BatchResponse(responses=results)
@@ -1,23 +1,155 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, contains_eager
 from typing import List, Optional
+from datetime import date, datetime
+from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, release_connection
 from app.models.user import User
 from app.models.doctor import Doctor
 from app.models.specialization import Specialization
-from app.schemas.doctor import DoctorResponse
+from app.models.review import Review, DoctorRatingStats
+from app.config import settings
+from app.api.fieldsets import Projection, rows_to_dicts, sparse_response
+from app.core.cache import cache, DOCTOR_PROFILE
+from app.core.geohash import covering_cells, haversine_km
+from app.api.deps import CurrentDoctor
+from app.schemas.doctor import DoctorResponse, NextAvailableDoctorResponse, DoctorPatientPage, CalendarFeedResponse
+from app.schemas.review import ReviewResponse
+from app.services.appointment_service import next_available
+from app.services.roster_service import ROSTER_SORTS, patient_roster
+from app.services.calendar_service import iter_feed, load_feed_state, new_feed_token
 
 router = APIRouter()
 
 
+def doctor_to_response(doctor: Doctor, distance_km: Optional[float] = None) -> DoctorResponse:
+    stats = doctor.rating_stats
+    return DoctorResponse(
+        id=doctor.id,
+        user_id=doctor.user_id,
+        specialization=doctor.specialization.name if doctor.specialization else None,
+        license_number=doctor.license_number,
+        bio=doctor.bio,
+        phone=doctor.phone,
+        consultation_fee=doctor.consultation_fee,
+        years_of_experience=doctor.years_of_experience,
+        appointment_duration_minutes=doctor.appointment_duration_minutes,
+        clinic_latitude=doctor.clinic_latitude,
+        clinic_longitude=doctor.clinic_longitude,
+        distance_km=distance_km,
+        average_rating=stats.average_rating if stats else None,
+        review_count=stats.review_count if stats else 0,
+        first_name=doctor.user.first_name,
+        last_name=doctor.user.last_name,
+        created_at=doctor.created_at
+    )
+
+
+def parse_coordinates(value: str):
+    try:
+        lat_text, lon_text = value.split(",")
+        latitude, longitude = float(lat_text), float(lon_text)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near must be given as 'latitude,longitude'"
+        )
+    
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Coordinates out of range"
+        )
+    return latitude, longitude
+
+
+DOCTOR_PROJECTION = Projection({
+    "id": (Doctor.id, ()),
+    "user_id": (Doctor.user_id, ()),
+    "specialization": (Specialization.name, ("specialization",)),
+    "license_number": (Doctor.license_number, ()),
+    "bio": (Doctor.bio, ()),
+    "phone": (Doctor.phone, ()),
+    "consultation_fee": (Doctor.consultation_fee, ()),
+    "years_of_experience": (Doctor.years_of_experience, ()),
+    "appointment_duration_minutes": (Doctor.appointment_duration_minutes, ()),
+    "clinic_latitude": (Doctor.clinic_latitude, ()),
+    "clinic_longitude": (Doctor.clinic_longitude, ()),
+    "average_rating": (DoctorRatingStats.average_rating, ("rating_stats",)),
+    "review_count": (DoctorRatingStats.review_count, ("rating_stats",)),
+    "first_name": (User.first_name, ("user",)),
+    "last_name": (User.last_name, ("user",)),
+    "created_at": (Doctor.created_at, ()),
+})
+
+# Search sorts as (rank column, ORDER BY). Every doctor has a stats row and
+# each ORDER BY matches idx_doctor_rating_stats_rank / _count exactly, so a
+# ranked page is an index scan joined to doctors
+SEARCH_SORTS = {
+    "rating": (DoctorRatingStats.average_rating, (
+        DoctorRatingStats.average_rating.desc().nullslast(),
+        DoctorRatingStats.review_count.desc(),
+        DoctorRatingStats.doctor_id,
+    )),
+    "reviews": (DoctorRatingStats.review_count, (
+        DoctorRatingStats.review_count.desc(),
+        DoctorRatingStats.doctor_id,
+    )),
+}
+
+
 @router.get("/search", response_model=List[DoctorResponse])
 def search_doctors(
     name: Optional[str] = Query(None),
     specialization: Optional[str] = Query(None),
+    near: Optional[str] = Query(None, description="latitude,longitude"),
+    radius: float = Query(10.0, gt=0, le=settings.GEO_SEARCH_MAX_RADIUS_KM, description="Search radius in km"),
+    min_rating: Optional[float] = Query(None, ge=1, le=5),
+    min_reviews: Optional[int] = Query(None, ge=1),
+    sort: Optional[str] = Query(None, description=f"One of: {', '.join(SEARCH_SORTS)}"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Doctor).join(User).join(Specialization, isouter=True)
+    if sort is not None and sort not in SEARCH_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort must be one of: {', '.join(SEARCH_SORTS)}"
+        )
+    
+    names = DOCTOR_PROJECTION.select(fields)
+    joins = DOCTOR_PROJECTION.joins(names)
+    columns = DOCTOR_PROJECTION.columns(names)
+    
+    if name:
+        joins.add("user")
+    if specialization:
+        joins.add("specialization")
+    if min_rating is not None or min_reviews is not None or sort:
+        joins.add("rating_stats")
+    if near:
+        latitude, longitude = parse_coordinates(near)
+        columns += [Doctor.clinic_latitude.label("near_latitude"), Doctor.clinic_longitude.label("near_longitude")]
+        if sort:
+            columns.append(SEARCH_SORTS[sort][0].label("near_rank"))
+    
+    # Only the tables the selected fields and filters live in are joined
+    query = db.query(*columns).select_from(Doctor)
+    if "user" in joins:
+        query = query.join(User, Doctor.user_id == User.id)
+    if "specialization" in joins:
+        query = query.outerjoin(Specialization, Doctor.specialization_id == Specialization.id)
+    if "rating_stats" in joins:
+        query = query.join(DoctorRatingStats, DoctorRatingStats.doctor_id == Doctor.id)
+    
+    # Running totals kept on every review write; nothing is aggregated here
+    if min_rating is not None:
+        query = query.filter(DoctorRatingStats.average_rating >= min_rating)
+    if min_reviews is not None:
+        query = query.filter(DoctorRatingStats.review_count >= min_reviews)
     
     if name:
         search_pattern = f"%{name}%"
@@ -29,47 +161,184 @@ def search_doctors(
     if specialization:
         query = query.filter(Specialization.name.ilike(f"%{specialization}%"))
     
-    doctors = query.all()
+    if near:
+        # Only doctors in the grid cells around the point are loaded
+        cells = covering_cells(latitude, longitude, radius)
+        query = query.filter(or_(*[Doctor.clinic_geohash.like(f"{cell}%") for cell in cells]))
+        
+        nearby = []
+        for row in query.all():
+            distance = haversine_km(latitude, longitude, row.near_latitude, row.near_longitude)
+            if distance <= radius:
+                nearby.append((distance, row))
+        if sort:
+            # Highest first, unrated last, then nearest
+            nearby.sort(key=lambda item: (item[1].near_rank is None, -(item[1].near_rank or 0), item[0]))
+        else:
+            nearby.sort(key=lambda item: item[0])
+        if limit:
+            nearby = nearby[:limit]
+        
+        items = [
+            dict(rows_to_dicts([row], names)[0], distance_km=round(distance, 2))
+            for distance, row in nearby
+        ]
+    else:
+        if sort:
+            query = query.order_by(*SEARCH_SORTS[sort][1])
+        if limit:
+            query = query.limit(limit)
+        items = rows_to_dicts(query.all(), names)
+    release_connection(db)
+    
+    if fields:
+        return sparse_response(items)
+    return items
+
+
+@router.get("/next-available", response_model=List[NextAvailableDoctorResponse])
+def get_next_available_doctors(
+    specialization: Optional[str] = Query(None),
+    after: Optional[datetime] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Doctor).join(User).join(Specialization, isouter=True).outerjoin(
+        DoctorRatingStats, DoctorRatingStats.doctor_id == Doctor.id
+    ).options(
+        contains_eager(Doctor.user),
+        contains_eager(Doctor.specialization),
+        contains_eager(Doctor.rating_stats)
+    )
+    
+    if specialization:
+        query = query.filter(Specialization.name.ilike(f"%{specialization}%"))
+    
+    # Slots are naive clinic-local times; never offer one in the past
+    now = datetime.now()
+    start = max(after.replace(tzinfo=None), now) if after else now
+    matches = next_available(db, query.all(), start, settings.NEXT_AVAILABLE_WINDOW_DAYS, limit)
+    
+    return [
+        NextAvailableDoctorResponse(
+            doctor=doctor_to_response(doctor),
+            date=slot_start.date(),
+            time=slot_start.time(),
+            duration_minutes=duration
+        )
+        for slot_start, duration, doctor in matches
+    ]
+
+
+@router.get("/me/patients", response_model=DoctorPatientPage)
+def get_my_patients(
+    doctor: CurrentDoctor,
+    q: Optional[str] = Query(None, description="Match on patient name or email"),
+    sort: str = Query("recent", description=f"One of: {', '.join(ROSTER_SORTS)}"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """Everyone the doctor has an appointment with, with last/next visit,
+    visit count and the doctor's record count per patient"""
+    if sort not in ROSTER_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort must be one of: {', '.join(ROSTER_SORTS)}"
+        )
     
-    result = []
-    for doctor in doctors:
-        result.append(DoctorResponse(
-            id=doctor.id,
-            user_id=doctor.user_id,
-            specialization=doctor.specialization.name if doctor.specialization else None,
-            license_number=doctor.license_number,
-            bio=doctor.bio,
-            phone=doctor.phone,
-            consultation_fee=doctor.consultation_fee,
-            years_of_experience=doctor.years_of_experience,
-            first_name=doctor.user.first_name,
-            last_name=doctor.user.last_name,
-            created_at=doctor.created_at
-        ))
+    try:
+        items, next_cursor = patient_roster(
+            db, doctor.doctor_id, date.today(), limit, search=q, sort=sort, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    release_connection(db)
     
-    return result
+    return DoctorPatientPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("/me/calendar-feed", response_model=CalendarFeedResponse)
+def rotate_calendar_feed(
+    request: Request,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
+    """Issue a new private calendar feed URL; any previous URL stops working"""
+    token, token_hash = new_feed_token()
+    db.query(Doctor).filter(Doctor.id == doctor.doctor_id).update(
+        {Doctor.calendar_token_hash: token_hash},
+        synchronize_session=False
+    )
+    db.commit()
+    
+    return CalendarFeedResponse(url=str(request.url_for("get_calendar_feed", token=token)))
+
+
+@router.get("/calendar/{token}.ics", response_class=StreamingResponse)
+def get_calendar_feed(
+    token: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """iCalendar feed of the doctor's appointments, for calendar apps to poll.
+
+    One indexed query resolves the token and the feed's last change; an
+    unchanged feed is answered 304 from that alone. Otherwise the feed is
+    streamed a page of appointments at a time.
+    """
+    state = load_feed_state(db, token, date.today())
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Calendar feed not found"
+        )
+    
+    if state.not_modified(if_none_match, if_modified_since):
+        release_connection(db)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=state.headers())
+    
+    return StreamingResponse(
+        iter_feed(db, state),
+        media_type="text/calendar; charset=utf-8",
+        headers=state.headers()
+    )
+
+
+@router.get("/{doctor_id}/reviews", response_model=List[ReviewResponse])
+def get_doctor_reviews(
+    doctor_id: UUID,
+    before: Optional[int] = Query(None, description="Review id to continue after"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Newest reviews first; pass the last id as ``before`` for the next page"""
+    query = db.query(Review).filter(Review.doctor_id == doctor_id)
+    if before is not None:
+        query = query.filter(Review.id < before)
+    return query.order_by(Review.id.desc()).limit(limit).all()
 
 
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 def get_doctor_by_id(doctor_id: str, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    try:
+        doctor_uuid = UUID(doctor_id)
+    except ValueError:
+        doctor_uuid = None
+    
+    def load():
+        doctor = db.query(Doctor).filter(Doctor.id == doctor_uuid).first()
+        return doctor_to_response(doctor) if doctor else None
     
-    if not doctor:
+    profile = cache.get_or_load(DOCTOR_PROFILE, doctor_uuid, load) if doctor_uuid else None
+    if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Doctor not found"
         )
     
-    return DoctorResponse(
-        id=doctor.id,
-        user_id=doctor.user_id,
-        specialization=doctor.specialization.name if doctor.specialization else None,
-        license_number=doctor.license_number,
-        bio=doctor.bio,
-        phone=doctor.phone,
-        consultation_fee=doctor.consultation_fee,
-        years_of_experience=doctor.years_of_experience,
-        first_name=doctor.user.first_name,
-        last_name=doctor.user.last_name,
-        created_at=doctor.created_at
-    )
+    return profile
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.core.events import broker
+from app.schemas.user import TokenData
+from app.api.deps import get_stream_token_data, active_token_data_from
+
+router = APIRouter()
+
+
+def format_sse(payload: dict) -> str:
+    return f"event: {payload.get('type', 'message')}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    claims: TokenData = Depends(get_stream_token_data)
+):
+    """Server-sent events for the current user (appointment changes).
+
+    No DB session is held; an idle connection costs one coroutine and one
+    small queue.
+    """
+    async def event_source():
+        async with broker.subscribe(claims.user_id) as queue:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(payload)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, token: str = Query(...)):
+    try:
+        claims = await run_in_threadpool(active_token_data_from, token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    async with broker.subscribe(claims.user_id) as queue:
+        async def pump():
+            while True:
+                await websocket.send_text(json.dumps(await queue.get(), default=str))
+
+        sender = asyncio.create_task(pump())
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        finally:
+            sender.cancel()
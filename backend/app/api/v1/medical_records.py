@@ -1,50 +1,276 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import date, datetime
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, release_connection
 from app.models.user import User
-from app.models.patient import Patient
+from app.models.doctor import Doctor
 from app.models.medical_record import MedicalRecord
-from app.schemas.medical_record import MedicalRecordResponse
-from app.api.deps import get_current_user
+from app.schemas.medical_record import (
+    MedicalRecordCreate,
+    MedicalRecordUpdate,
+    MedicalRecordResponse,
+    BulkImportResponse,
+)
+from app.schemas.audit_log import AuditEventPage, AuditEventResponse
+from app.api.deps import CurrentClaims, CurrentDoctor, CurrentPatient
+from app.api.fieldsets import Projection, rows_to_dicts, sparse_response
+from app.services.audit_service import record_access, query_audit_events
+from app.services.medical_record_service import (
+    BulkImportResult,
+    check_appointment_link,
+    import_batch,
+    parse_import_line,
+)
 
 router = APIRouter()
 
 
+def record_to_response(record: MedicalRecord, doctor_name: str) -> MedicalRecordResponse:
+    return MedicalRecordResponse(
+        id=record.id,
+        patient_id=record.patient_id,
+        doctor_id=record.doctor_id,
+        appointment_id=record.appointment_id,
+        title=record.title,
+        diagnosis=record.diagnosis,
+        treatment=record.treatment,
+        prescription=record.prescription,
+        notes=record.notes,
+        date=record.date,
+        doctor_name=doctor_name,
+        created_at=record.created_at
+    )
+
+
+MEDICAL_RECORD_PROJECTION = Projection({
+    "id": (MedicalRecord.id, ()),
+    "patient_id": (MedicalRecord.patient_id, ()),
+    "doctor_id": (MedicalRecord.doctor_id, ()),
+    "appointment_id": (MedicalRecord.appointment_id, ()),
+    "title": (MedicalRecord.title, ()),
+    "diagnosis": (MedicalRecord.diagnosis, ()),
+    "treatment": (MedicalRecord.treatment, ()),
+    "prescription": (MedicalRecord.prescription, ()),
+    "notes": (MedicalRecord.notes, ()),
+    "date": (MedicalRecord.date, ()),
+    "doctor_name": (User.first_name + " " + User.last_name, ("doctor_user",)),
+    "created_at": (MedicalRecord.created_at, ()),
+})
+
+
 @router.get("/my", response_model=List[MedicalRecordResponse])
 def get_my_medical_records(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    claims: CurrentClaims,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    date_from: Optional[date] = Query(None, description="Only records on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only records on or before this date"),
     db: Session = Depends(get_db)
 ):
-    if current_user.role != "patient":
+    if claims.role != "patient":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only patients can access medical records"
         )
-    
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
+    if claims.patient_id is None:
         return []
     
-    records = db.query(MedicalRecord).filter(
-        MedicalRecord.patient_id == patient.id
-    ).order_by(MedicalRecord.date.desc()).all()
-    
-    result = []
-    for record in records:
-        result.append(MedicalRecordResponse(
-            id=record.id,
-            patient_id=record.patient_id,
-            doctor_id=record.doctor_id,
-            title=record.title,
-            diagnosis=record.diagnosis,
-            treatment=record.treatment,
-            prescription=record.prescription,
-            notes=record.notes,
-            date=record.date,
-            doctor_name=record.doctor.user.full_name,
-            created_at=record.created_at
-        ))
-    
-    return result
+    names = MEDICAL_RECORD_PROJECTION.select(fields)
+    
+    query = db.query(*MEDICAL_RECORD_PROJECTION.columns(names)).select_from(MedicalRecord)
+    if "doctor_user" in MEDICAL_RECORD_PROJECTION.joins(names):
+        query = query.join(Doctor, MedicalRecord.doctor_id == Doctor.id).join(User, Doctor.user_id == User.id)
+    
+    query = query.filter(MedicalRecord.patient_id == claims.patient_id)
+    # Date bounds prune the monthly partitions outside the range
+    if date_from is not None:
+        query = query.filter(MedicalRecord.date >= date_from)
+    if date_to is not None:
+        query = query.filter(MedicalRecord.date <= date_to)
+    rows = query.order_by(MedicalRecord.date.desc()).all()
+    items = rows_to_dicts(rows, names)
+    release_connection(db)
+    
+    record_access(
+        "read",
+        "medical_record",
+        actor_user_id=claims.user_id,
+        actor_role=claims.role,
+        patient_id=claims.patient_id,
+        ip_address=request.client.host if request.client else None,
+        record_count=len(items),
+        details={"record_ids": [item["id"] for item in items], "fields": names},
+    )
+    
+    if fields:
+        return sparse_response(items)
+    return items
+
+
+def parse_audit_cursor(cursor: str):
+    try:
+        occurred_at, event_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(occurred_at), int(event_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/my/access-log", response_model=AuditEventPage)
+def get_my_record_access_log(
+    patient: CurrentPatient,
+    cursor: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """Who accessed the current patient's medical records, newest first"""
+    before = parse_audit_cursor(cursor) if cursor else None
+    events = query_audit_events(db, patient.patient_id, limit + 1, before=before, since=since)
+    
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = f"{last.occurred_at.isoformat()}_{last.id}"
+    
+    return AuditEventPage(
+        items=[AuditEventResponse.model_validate(event) for event in events],
+        next_cursor=next_cursor
+    )
+
+
+@router.post("", response_model=MedicalRecordResponse, status_code=status.HTTP_201_CREATED)
+def create_medical_record(
+    record_data: MedicalRecordCreate,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
+    error = check_appointment_link(db, doctor.doctor_id, record_data.patient_id, record_data.appointment_id)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    record = MedicalRecord(doctor_id=doctor.doctor_id, **record_data.model_dump())
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+    
+    record_access(
+        "create",
+        "medical_record",
+        actor_user_id=doctor.user_id,
+        actor_role=doctor.role,
+        patient_id=record.patient_id,
+        resource_id=str(record.id),
+    )
+    
+    return record_to_response(record, doctor.name)
+
+
+@router.put("/{record_id}", response_model=MedicalRecordResponse)
+def update_medical_record(
+    record_id: int,
+    record_data: MedicalRecordUpdate,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
+    record = db.query(MedicalRecord).filter(MedicalRecord.id == record_id).first()
+    
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Medical record not found"
+        )
+    
+    if record.doctor_id != doctor.doctor_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this medical record"
+        )
+    
+    for field, value in record_data.model_dump().items():
+        setattr(record, field, value)
+    
+    db.commit()
+    db.refresh(record)
+    
+    record_access(
+        "update",
+        "medical_record",
+        actor_user_id=doctor.user_id,
+        actor_role=doctor.role,
+        patient_id=record.patient_id,
+        resource_id=str(record.id),
+    )
+    
+    return record_to_response(record, doctor.name)
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_medical_records(
+    request: Request,
+    doctor: CurrentDoctor,
+    db: Session = Depends(get_db)
+):
+    """Import records from an NDJSON body, one MedicalRecordImport per line.
+
+    Lines are validated and inserted in batches while the body is still
+    streaming in. Each line may carry an ``idempotency_key``; lines without
+    one are keyed by their content, so retrying an import never creates
+    duplicates.
+    """
+    result = BulkImportResult()
+    batch = []
+    line_number = 0
+    buffer = b""
+    
+    async def flush():
+        nonlocal batch
+        if batch:
+            await run_in_threadpool(import_batch, db, doctor.doctor_id, batch, result)
+            batch = []
+    
+    async def handle(line: bytes):
+        nonlocal line_number
+        line_number += 1
+        if not line.strip():
+            return
+        parsed = parse_import_line(line_number, line, result)
+        if parsed:
+            batch.append(parsed)
+        if len(batch) >= settings.MEDICAL_RECORD_IMPORT_BATCH_SIZE:
+            await flush()
+    
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            await handle(line)
+        if len(buffer) > settings.MEDICAL_RECORD_IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line {line_number + 1} exceeds {settings.MEDICAL_RECORD_IMPORT_MAX_LINE_BYTES} bytes"
+            )
+    
+    await handle(buffer)
+    await flush()
+    
+    record_access(
+        "import",
+        "medical_record",
+        actor_user_id=doctor.user_id,
+        actor_role=doctor.role,
+        record_count=result.created,
+        details={"duplicates": result.duplicates, "failed": result.failed},
+    )
+    
+    return result.as_dict()
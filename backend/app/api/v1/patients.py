@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db, release_connection
+from app.schemas.timeline import TimelinePage
+from app.api.deps import CurrentPatient
+from app.services.audit_service import record_access
+from app.services.timeline_service import TIMELINE_SOURCES, timeline_page
+
+router = APIRouter()
+
+
+@router.get("/me/timeline", response_model=TimelinePage)
+def get_my_timeline(
+    request: Request,
+    patient: CurrentPatient,
+    cursor: Optional[str] = Query(None),
+    types: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(TIMELINE_SOURCES)}"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Appointments, medical records and attachments, newest first"""
+    selected = None
+    if types:
+        selected = [name.strip() for name in types.split(",") if name.strip()]
+        unknown = sorted(set(selected) - set(TIMELINE_SOURCES))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown types: {', '.join(unknown)}. Allowed: {', '.join(TIMELINE_SOURCES)}"
+            )
+    
+    try:
+        items, next_cursor = timeline_page(db, patient.patient_id, limit, cursor=cursor, types=selected)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    release_connection(db)
+    
+    record_ids = [item.id for item in items if item.type == "medical_record"]
+    if record_ids:
+        record_access(
+            "read",
+            "medical_record",
+            actor_user_id=patient.user_id,
+            actor_role=patient.role,
+            patient_id=patient.patient_id,
+            ip_address=request.client.host if request.client else None,
+            record_count=len(record_ids),
+            details={"record_ids": record_ids, "via": "timeline"},
+        )
+    
+    return TimelinePage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.appointment import Appointment
+from app.models.review import Review
+from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewResponse
+from app.api.deps import CurrentPatient
+from app.services.review_service import adjust_rating_stats
+
+router = APIRouter()
+
+
+@router.post("", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
+def create_review(
+    review_data: ReviewCreate,
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    """Rate a completed appointment; one review per appointment"""
+    appointment = db.query(
+        Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.status
+    ).filter(Appointment.id == review_data.appointment_id).first()
+
+    if not appointment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found"
+        )
+
+    if appointment.patient_id != patient.patient_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to review this appointment"
+        )
+
+    if appointment.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only completed appointments can be reviewed"
+        )
+
+    review = Review(
+        appointment_id=appointment.id,
+        doctor_id=appointment.doctor_id,
+        patient_id=patient.patient_id,
+        rating=review_data.rating,
+        comment=review_data.comment
+    )
+    db.add(review)
+    try:
+        db.flush()
+        adjust_rating_stats(db, appointment.doctor_id, 1, review_data.rating)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This appointment has already been reviewed"
+        )
+    db.refresh(review)
+
+    return review
+
+
+@router.put("/{review_id}", response_model=ReviewResponse)
+def update_review(
+    review_id: int,
+    review_data: ReviewUpdate,
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    # Locked so two edits can't both apply their delta against the same old rating
+    review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
+
+    if not review:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+
+    if review.patient_id != patient.patient_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this review"
+        )
+
+    delta = review_data.rating - review.rating
+    review.rating = review_data.rating
+    review.comment = review_data.comment
+    db.flush()
+    if delta:
+        adjust_rating_stats(db, review.doctor_id, 0, delta)
+    db.commit()
+    db.refresh(review)
+
+    return review
@@ -0,0 +1,158 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import date, datetime, time
+
+from app.database import get_db
+from app.models.doctor import Doctor
+from app.models.appointment import Appointment
+from app.models.waitlist_entry import WaitlistEntry
+from app.schemas.waitlist import WaitlistCreate, WaitlistEntryResponse
+from app.api.deps import CurrentPatient
+from app.core.events import publish_event
+from app.services.appointment_service import appointment_event
+from app.services.waitlist_service import LIVE_STATUSES, release_offer
+
+router = APIRouter()
+
+
+def get_own_entry(db: Session, entry_id: int, patient_id) -> WaitlistEntry:
+    entry = db.query(WaitlistEntry).filter(WaitlistEntry.id == entry_id).with_for_update().first()
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Waitlist entry not found"
+        )
+    if entry.patient_id != patient_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to change this waitlist entry"
+        )
+    return entry
+
+
+@router.post("", response_model=WaitlistEntryResponse, status_code=status.HTTP_201_CREATED)
+def join_waitlist(
+    entry_data: WaitlistCreate,
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    """Wait for a slot with a doctor on a date, optionally within a time window"""
+    if entry_data.date < date.today():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot join the waitlist for a past date"
+        )
+    
+    earliest = entry_data.earliest_time or time.min
+    latest = entry_data.latest_time or time.max
+    if earliest >= latest:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="earliest_time must be before latest_time"
+        )
+    
+    if not db.query(Doctor.id).filter(Doctor.id == entry_data.doctor_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+    
+    entry = WaitlistEntry(
+        patient_id=patient.patient_id,
+        doctor_id=entry_data.doctor_id,
+        date=entry_data.date,
+        earliest_time=earliest,
+        latest_time=latest,
+        status="waiting"
+    )
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You are already on this doctor's waitlist for that date"
+        )
+    db.refresh(entry)
+    
+    return entry
+
+
+@router.get("/my", response_model=List[WaitlistEntryResponse])
+def get_my_waitlist(
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    return db.query(WaitlistEntry).filter(
+        WaitlistEntry.patient_id == patient.patient_id,
+        WaitlistEntry.status.in_(LIVE_STATUSES),
+        WaitlistEntry.date >= date.today()
+    ).order_by(WaitlistEntry.date, WaitlistEntry.created_at).all()
+
+
+@router.post("/{entry_id}/accept", response_model=WaitlistEntryResponse)
+def accept_offer(
+    entry_id: int,
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    """Book the slot held for this entry"""
+    entry = get_own_entry(db, entry_id, patient.patient_id)
+    
+    if entry.status != "offered":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This waitlist entry has no open offer"
+        )
+    if entry.offer_expires_at <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="This offer has expired"
+        )
+    
+    appointment = Appointment(
+        patient_id=patient.patient_id,
+        doctor_id=entry.doctor_id,
+        date=entry.date,
+        time=entry.offered_time,
+        duration_minutes=entry.offered_minutes,
+        reason="Booked from the waitlist",
+        status="pending"
+    )
+    db.add(appointment)
+    try:
+        db.flush()
+        entry.status = "booked"
+        entry.appointment_id = appointment.id
+        doctor_user_id = db.query(Doctor.user_id).filter(Doctor.id == entry.doctor_id).scalar()
+        publish_event(db, [patient.user_id, doctor_user_id], appointment_event(appointment, "appointment.created"))
+        db.commit()
+    except IntegrityError:
+        # Only possible if the slot was booked around the hold
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This time slot is already booked."
+        )
+    db.refresh(entry)
+    
+    return entry
+
+
+@router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+def leave_waitlist(
+    entry_id: int,
+    patient: CurrentPatient,
+    db: Session = Depends(get_db)
+):
+    """Leave the waitlist, or decline an offer; a held slot goes to the next patient"""
+    entry = get_own_entry(db, entry_id, patient.patient_id)
+    
+    if entry.status in LIVE_STATUSES:
+        release_offer(db, entry, "withdrawn", datetime.utcnow())
+        db.commit()
+    
+    return None
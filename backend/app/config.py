@@ -10,11 +10,114 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    TOKEN_CACHE_SIZE: int = 10_000
+    # Seconds a user's is_active flag is trusted for token checks; commits
+    # through the ORM evict it immediately (app.core.invalidation)
+    USER_STATUS_CACHE_TTL: float = 30.0
 
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: Optional[int] = None
+    ADMISSION_MAX_QUEUE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+
+    REDIS_URL: Optional[str] = None
+
+    DEFAULT_APPOINTMENT_MINUTES: int = 30
+    SLOT_SEARCH_MAX_DAYS: int = 31
+    NEXT_AVAILABLE_WINDOW_DAYS: int = 7
+    GEO_SEARCH_MAX_RADIUS_KM: float = 200.0
+
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    # "block": wait AUDIT_ENQUEUE_TIMEOUT then write inline; "drop": discard and count
+    AUDIT_OVERFLOW: str = "block"
+    AUDIT_ENQUEUE_TIMEOUT: float = 0.05
+
+    MEDICAL_RECORD_IMPORT_BATCH_SIZE: int = 500
+    MEDICAL_RECORD_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+
+    # "memory": deliver within this worker; "postgres": fan out via LISTEN/NOTIFY
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_CHANNEL: str = "appointment_events"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    CACHE_ENABLED: bool = True
+    # memory | redis | package.module:BackendClass
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_DEFAULT_TTL: float = 300.0
+    # How long coalesced readers wait for the query already in flight
+    CACHE_FLIGHT_TIMEOUT: float = 5.0
+    # "memory": evict in this worker only; "postgres": broadcast via LISTEN/NOTIFY
+    CACHE_INVALIDATION_BACKEND: str = "memory"
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+
+    IDEMPOTENCY_ENABLED: bool = True
+    # "memory": per-worker LRU; "database": shared idempotency_keys table
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_MAX_ENTRIES: int = 10_000
+    # How long a duplicate waits for the original request to finish
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
+    # After this a claim whose worker died can be taken over
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+
+    # none | jsonl (TRACING_FILE) | log; request ids are always assigned
+    TRACING_SINK: str = "none"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SAMPLE_RATE: float = 0.01
+    # Requests whose X-Trace-Sample header equals this are always traced;
+    # unset, the header is ignored
+    TRACING_FORCE_SECRET: Optional[str] = None
+
+    # How long a freed slot is held for the waitlisted patient it was offered to
+    WAITLIST_HOLD_MINUTES: int = 15
+    # How much queue position a wide time window costs: each hour of window
+    # ranks the entry as if it had signed up this many hours later
+    WAITLIST_FLEXIBILITY_PENALTY: float = 0.25
+    # Seconds between sweeps for unanswered offers
+    WAITLIST_SWEEP_INTERVAL: float = 5.0
+
+    # Days of past and upcoming appointments in a doctor's calendar feed
+    CALENDAR_FEED_PAST_DAYS: int = 30
+    CALENDAR_FEED_FUTURE_DAYS: int = 180
+    # Right-hand side of event UIDs; keep stable or clients duplicate events
+    CALENDAR_FEED_UID_DOMAIN: str = "healthcare-api"
+
+    BATCH_MAX_ITEMS: int = 20
+    BATCH_READ_CONCURRENCY: int = 4
+
+    ATTACHMENT_STORAGE_DIR: str = "storage/attachments"
+    ATTACHMENT_MAX_BYTES: int = 50 * 1024 * 1024
+    ATTACHMENT_ALLOWED_TYPES: list = [
+        "application/pdf",
+        "image/png",
+        "image/jpeg",
+        "image/tiff",
+        "application/dicom",
+    ]
+
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_SHARDS: int = 16
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100_000
+    LOGIN_RATE_PER_IP_PER_MINUTE: float = 30
+    LOGIN_RATE_IP_BURST: int = 10
+    LOGIN_RATE_PER_ACCOUNT_PER_MINUTE: float = 5
+    LOGIN_RATE_ACCOUNT_BURST: int = 5
 
     BACKEND_CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
 
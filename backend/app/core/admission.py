@@ -0,0 +1,185 @@
+# app/core/admission.py
+import asyncio
+import heapq
+import itertools
+import json
+from typing import Optional
+
+from app.config import settings
+
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Routes that never touch the database skip admission entirely.
+EXEMPT_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json", "/docs/oauth2-redirect"}
+
+# Long-lived push connections hold no DB connection and must not hold a slot.
+EXEMPT_PREFIXES = ("/events",)
+
+# First match wins. Paths are relative to API_V1_PREFIX.
+ROUTE_PRIORITIES = [
+    ("POST", "/appointments", PRIORITY_CRITICAL),
+    ("PATCH", "/appointments", PRIORITY_CRITICAL),
+    ("POST", "/auth/login", PRIORITY_CRITICAL),
+    ("GET", "/auth/me", PRIORITY_CRITICAL),
+    ("GET", "/doctors/search", PRIORITY_LOW),
+    ("GET", "/availability/doctor", PRIORITY_LOW),
+]
+
+
+def classify_request(method: str, path: str) -> Optional[int]:
+    """Return the admission priority for a request, or None if it is exempt."""
+    if path in EXEMPT_PATHS:
+        return None
+
+    prefix = settings.API_V1_PREFIX
+    if not path.startswith(prefix):
+        return None
+
+    route = path[len(prefix):]
+    if route.startswith(EXEMPT_PREFIXES):
+        return None
+
+    for rule_method, rule_path, priority in ROUTE_PRIORITIES:
+        if method == rule_method and route.startswith(rule_path):
+            return priority
+    return PRIORITY_NORMAL
+
+
+class AdmissionController:
+    """Bounded, priority-ordered gate in front of the connection pool.
+
+    At most ``capacity`` requests run at once. Further requests wait in a
+    priority queue for up to ``queue_timeout`` seconds; anything beyond
+    ``max_queue`` waiters, or a low-priority request arriving while the pool
+    has already spilled into overflow, is rejected immediately.
+    """
+
+    def __init__(self, capacity: int, max_queue: int, queue_timeout: float, pool=None):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.pool = pool
+
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    def pool_saturated(self) -> bool:
+        if self.pool is None or not hasattr(self.pool, "checkedout"):
+            return False
+        return self.pool.checkedout() >= self.pool.size()
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now; never queues."""
+        if self.in_flight < self.capacity and not self.queued:
+            self.in_flight += 1
+            return True
+        return False
+
+    async def acquire(self, priority: int) -> bool:
+        if self.in_flight < self.capacity and not self.queued:
+            self.in_flight += 1
+            return True
+
+        if self.queued >= self.max_queue or (priority == PRIORITY_LOW and self.pool_saturated()):
+            self.rejected += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self.queued += 1
+
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot we may have been handed.
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self.queued -= 1
+            raise
+
+        if future.done() and not future.cancelled():
+            return True
+
+        future.cancel()
+        self.queued -= 1
+        self.rejected += 1
+        return False
+
+    def release(self) -> None:
+        # Hand the slot straight to the best waiter so in_flight never dips
+        # and lets a newcomer jump the queue.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.queued -= 1
+                future.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "pool_checked_out": self.pool.checkedout() if self.pool is not None else None,
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that sheds load with a fast 503 instead of letting
+    requests pile up behind an exhausted connection pool."""
+
+    def __init__(self, app, controller: AdmissionController, retry_after: int = 1):
+        self.app = app
+        self.controller = controller
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify_request(scope["method"], scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire(priority):
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_admission_controller(engine) -> AdmissionController:
+    capacity = settings.ADMISSION_MAX_IN_FLIGHT or (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    return AdmissionController(
+        capacity=capacity,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        pool=engine.pool,
+    )
@@ -0,0 +1,216 @@
+# app/core/cache.py
+import importlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+
+# Namespaces of cached reference data; writers invalidate by (namespace, id)
+SPECIALIZATION_BY_NAME = "specialization"
+DOCTOR_PROFILE = "doctor_profile"
+DOCTOR_AVAILABILITY = "doctor_availability"
+USER_STATUS = "user_status"
+
+
+class CacheBackend:
+    """Key/value storage for the read-through cache.
+
+    ``get`` returns ``(found, value)`` so that falsy values can be cached.
+    ``incr`` must be atomic; it drives version-based invalidation, and
+    ``get_version`` reads back what it wrote (0 if never incremented).
+    """
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def get_version(self, key: str) -> int:
+        found, version = self.get(key)
+        return version if found else 0
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU with a TTL per entry. Also the local stand-in for a
+    shared backend in development and single-worker deployments."""
+
+    def __init__(self, max_entries: int = 10_000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            _, current = self._entries.get(key, (None, 0))
+            # Version counters never expire; they are tiny and must not reset
+            self._entries[key] = (None, current + 1)
+            self._entries.move_to_end(key)
+            return current + 1
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every worker. Requires the optional ``redis`` package.
+
+    Values are pickled; only this application writes to the cache.
+    """
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        if raw is None:
+            return False, None
+        return True, pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def incr(self, key):
+        return int(self._client.incr(self._prefix + key))
+
+    def get_version(self, key):
+        # INCR stores a plain integer string, not a pickle
+        raw = self._client.get(self._prefix + key)
+        return int(raw) if raw is not None else 0
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ReadThroughCache:
+    """Versioned read-through cache with single-flight loading.
+
+    Entries live under ``{namespace}:{id}:v{version}``. Writers call
+    ``invalidate(namespace, id)`` after committing, which bumps the version
+    so every reader moves to a fresh key; superseded entries simply age out.
+
+    Concurrent misses for the same key are coalesced: one caller runs the
+    loader while the rest wait for its result, so a burst of requests for a
+    popular doctor costs a single query.
+    """
+
+    def __init__(self, backend: CacheBackend, default_ttl: float = 300.0, flight_timeout: float = 5.0):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.flight_timeout = flight_timeout
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _version(self, namespace: str, item_id) -> int:
+        return self.backend.get_version(f"version:{namespace}:{item_id}")
+
+    def get_or_load(self, namespace: str, item_id, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value, or call ``loader`` once to fill it.
+
+        A loader result of None (nothing found) is returned but not cached.
+        """
+        key = f"{namespace}:{item_id}:v{self._version(namespace, item_id)}"
+        found, value = self.backend.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.coalesced += 1
+            if flight.done.wait(self.flight_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            # The leader is stuck; fall through and load independently
+            return loader()
+
+        self.misses += 1
+        try:
+            flight.value = loader()
+            if flight.value is not None:
+                self.backend.set(key, flight.value, ttl or self.default_ttl)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, namespace: str, item_id) -> None:
+        self.backend.incr(f"version:{namespace}:{item_id}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+
+class NullCache(ReadThroughCache):
+    """Used when CACHE_ENABLED is off: every read goes to the loader."""
+
+    def __init__(self):
+        super().__init__(backend=None)
+
+    def get_or_load(self, namespace, item_id, loader, ttl=None):
+        self.misses += 1
+        return loader()
+
+    def invalidate(self, namespace, item_id):
+        pass
+
+
+def _build_backend() -> CacheBackend:
+    backend = settings.CACHE_BACKEND
+    if backend == "memory":
+        return InMemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        return RedisCacheBackend(settings.REDIS_URL)
+
+    # Anything else is a "package.module:ClassName" taking no arguments.
+    module_name, _, class_name = backend.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+if settings.CACHE_ENABLED:
+    cache = ReadThroughCache(_build_backend(), settings.CACHE_DEFAULT_TTL, settings.CACHE_FLIGHT_TIMEOUT)
+else:
+    cache = NullCache()
@@ -0,0 +1,176 @@
+# app/core/events.py
+import asyncio
+import json
+import logging
+import re
+import select
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    """In-process pub/sub keyed by user id.
+
+    Each open SSE/WebSocket connection holds one small bounded queue; a slow
+    consumer loses its oldest events rather than growing without bound.
+    ``dispatch`` may be called from any thread.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        key = str(user_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[key].add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[key]
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, user_ids: Iterable, payload: dict) -> None:
+        user_ids = [str(user_id) for user_id in user_ids]
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_ids, payload)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_ids, payload)
+
+    def _deliver(self, user_ids, payload: dict) -> None:
+        for user_id in user_ids:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(payload)
+
+
+broker = EventBroker(settings.EVENTS_QUEUE_SIZE)
+
+
+def publish_event(db: Session, user_ids: Iterable, payload: dict) -> None:
+    """Queue an event for delivery once ``db``'s transaction commits.
+
+    With the Postgres backend this issues ``pg_notify`` inside the
+    transaction, so every worker (this one included) receives it exactly
+    when the data becomes visible. Otherwise it is held on the session and
+    delivered to local subscribers after commit.
+    """
+    message = {"user_ids": [str(user_id) for user_id in user_ids], "event": payload}
+    if settings.EVENTS_BACKEND == "postgres":
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.EVENTS_CHANNEL, "payload": json.dumps(message, default=str)}
+        )
+    else:
+        db.info.setdefault("pending_events", []).append(message)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending_events(session: Session) -> None:
+    for message in session.info.pop("pending_events", ()):
+        broker.dispatch(message["user_ids"], message["event"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop("pending_events", None)
+
+
+class PostgresNotifyListener:
+    """Background thread that LISTENs on a channel and feeds the broker.
+
+    Holds one dedicated connection outside the SQLAlchemy pool and
+    reconnects with a short back-off if it drops.
+    """
+
+    def __init__(self, dsn: str, channel: str, handler):
+        if not re.fullmatch(r"[a-z_][a-z0-9_]*", channel):
+            raise ValueError(f"Invalid channel name: {channel}")
+        self.dsn = dsn
+        self.channel = channel
+        self.handler = handler
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=f"listen-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        import psycopg2
+        import psycopg2.extensions
+
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(self.dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                connection.cursor().execute(f"LISTEN {self.channel}")
+
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        try:
+                            self.handler(json.loads(notification.payload))
+                        except Exception:
+                            logger.exception("Bad notification on %s", self.channel)
+            except psycopg2.Error:
+                logger.exception("LISTEN connection on %s lost; reconnecting", self.channel)
+                self._stopping.wait(1.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+def _dispatch_notification(message: dict) -> None:
+    broker.dispatch(message["user_ids"], message["event"])
+
+
+def build_notify_listener(database_url, channel: str, handler) -> PostgresNotifyListener:
+    from sqlalchemy.engine import make_url
+
+    dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    return PostgresNotifyListener(dsn, channel, handler)
+
+
+event_listener: Optional[PostgresNotifyListener] = None
+if settings.EVENTS_BACKEND == "postgres":
+    event_listener = build_notify_listener(settings.DATABASE_URL, settings.EVENTS_CHANNEL, _dispatch_notification)
@@ -0,0 +1,129 @@
+# app/core/geohash.py
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Approximate cell size in km at the equator, indexed by precision: (height, width)
+_CELL_KM = {
+    1: (4992.6, 5009.4),
+    2: (624.1, 1252.3),
+    3: (156.0, 156.5),
+    4: (19.5, 39.1),
+    5: (4.9, 4.9),
+    6: (0.61, 1.22),
+    7: (0.153, 0.153),
+}
+
+STORED_PRECISION = 9
+
+
+def encode(latitude: float, longitude: float, precision: int = STORED_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Return ``(lat_min, lat_max, lon_min, lon_max)`` of a cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def neighbors(geohash: str) -> List[str]:
+    """The cell itself plus its (up to) eight surrounding cells."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(geohash)
+    lat_step = lat_hi - lat_lo
+    lon_step = lon_hi - lon_lo
+    lat_mid = (lat_lo + lat_hi) / 2
+    lon_mid = (lon_lo + lon_hi) / 2
+
+    cells = []
+    for dlat in (-1, 0, 1):
+        lat = lat_mid + dlat * lat_step
+        if lat < -90 or lat > 90:
+            continue
+        for dlon in (-1, 0, 1):
+            lon = (lon_mid + dlon * lon_step + 180) % 360 - 180
+            cell = encode(lat, lon, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def precision_for_radius(latitude: float, radius_km: float) -> int:
+    """Finest precision whose cells are at least ``radius_km`` on each side, so
+    a 3x3 block around the centre cell covers the whole search circle."""
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    best = 1
+    for precision, (height, width) in sorted(_CELL_KM.items()):
+        if min(height, width * shrink) >= radius_km:
+            best = precision
+    return best
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    precision = precision_for_radius(latitude, radius_km)
+    return neighbors(encode(latitude, longitude, precision))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,380 @@
+# app/core/idempotency.py
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# (method, path relative to API_V1_PREFIX) of endpoints that honour the header
+IDEMPOTENT_ROUTES = [
+    ("POST", re.compile(r"^/appointments/?$")),
+    ("PATCH", re.compile(r"^/appointments/[^/]+/status/?$")),
+    ("PATCH", re.compile(r"^/appointments/status/?$")),
+    ("POST", re.compile(r"^/waitlist/[^/]+/accept/?$")),
+    ("POST", re.compile(r"^/auth/register/?$")),
+]
+
+
+class StoredResponse:
+    def __init__(self, status_code: int, headers: List[Tuple[str, str]], body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+
+class IdempotencyRecord:
+    """A claimed key. ``response`` is None while the first request runs."""
+
+    def __init__(self, fingerprint: str, response: Optional[StoredResponse] = None):
+        self.fingerprint = fingerprint
+        self.response = response
+
+
+class IdempotencyStore:
+    """Where claimed keys and their responses live.
+
+    ``claim`` atomically reserves ``key`` and returns ``(True, record)``, or
+    returns ``(False, existing)`` if another request already holds it.
+    """
+
+    blocking = False
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, IdempotencyRecord]:
+        raise NotImplementedError
+
+    def lookup(self, key: str) -> Optional[IdempotencyRecord]:
+        raise NotImplementedError
+
+    def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        raise NotImplementedError
+
+    def release(self, key: str) -> None:
+        """Forget an unfinished claim so a retry runs the request again."""
+        raise NotImplementedError
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Bounded LRU of responses, each kept for ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float, lock_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._entries: "OrderedDict[str, Tuple[float, IdempotencyRecord]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[IdempotencyRecord]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return record
+
+    def _put(self, key: str, record: IdempotencyRecord, lifetime: float) -> None:
+        self._entries[key] = (time.monotonic() + lifetime, record)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def claim(self, key, fingerprint):
+        with self._lock:
+            existing = self._get(key)
+            if existing is not None:
+                return False, existing
+            record = IdempotencyRecord(fingerprint)
+            self._put(key, record, self.lock_seconds)
+            return True, record
+
+    def lookup(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def complete(self, key, fingerprint, response):
+        with self._lock:
+            self._put(key, IdempotencyRecord(fingerprint, response), self.ttl)
+
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Keys shared by every worker through the ``idempotency_keys`` table.
+
+    A claim is an ``INSERT ... ON CONFLICT`` that only takes over rows past
+    their ``expires_at``, so a claim left behind by a crashed worker frees
+    itself after ``lock_seconds``.
+    """
+
+    blocking = True
+    PURGE_EVERY = 1000
+
+    def __init__(self, session_factory, ttl: float, lock_seconds: float):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._claims = 0
+
+    def claim(self, key, fingerprint):
+        now = datetime.utcnow()
+        values = dict(
+            key=key, fingerprint=fingerprint, status_code=None, headers=None, body=None,
+            created_at=now, expires_at=now + timedelta(seconds=self.lock_seconds),
+        )
+        statement = insert(IdempotencyKey).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={name: statement.excluded[name] for name in values if name != "key"},
+            where=IdempotencyKey.expires_at < now,
+        ).returning(IdempotencyKey.key)
+
+        db = self.session_factory()
+        try:
+            claimed = db.execute(statement).first() is not None
+            self._claims += 1
+            if self._claims % self.PURGE_EVERY == 0:
+                db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+            db.commit()
+            if claimed:
+                return True, IdempotencyRecord(fingerprint)
+            return False, self._load(db, key) or IdempotencyRecord(fingerprint)
+        finally:
+            db.close()
+
+    def _load(self, db, key: str) -> Optional[IdempotencyRecord]:
+        row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+        response = None
+        if row.status_code is not None:
+            response = StoredResponse(row.status_code, [tuple(pair) for pair in row.headers or []], row.body or b"")
+        return IdempotencyRecord(row.fingerprint, response)
+
+    def lookup(self, key):
+        db = self.session_factory()
+        try:
+            return self._load(db, key)
+        finally:
+            db.close()
+
+    def complete(self, key, fingerprint, response):
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update({
+                IdempotencyKey.status_code: response.status_code,
+                IdempotencyKey.headers: [list(pair) for pair in response.headers],
+                IdempotencyKey.body: response.body,
+                IdempotencyKey.expires_at: datetime.utcnow() + timedelta(seconds=self.ttl),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self, key):
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def is_idempotent_route(method: str, path: str) -> bool:
+    prefix = settings.API_V1_PREFIX
+    if not path.startswith(prefix):
+        return False
+    route = path[len(prefix):]
+    return any(method == rule_method and pattern.match(route) for rule_method, pattern in IDEMPOTENT_ROUTES)
+
+
+def should_store(status_code: int) -> bool:
+    # Server errors and throttling are worth retrying for real
+    return status_code < 500 and status_code != 429
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated ``Idempotency-Key``.
+
+    Keys are scoped to the caller's Authorization header, so two users can
+    never see each other's responses. A duplicate that arrives while the
+    first request is still running waits for its result instead of running
+    again; reusing a key for a different request is a 422.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, wait_timeout: float = 10.0):
+        self.app = app
+        self.store = store
+        self.wait_timeout = wait_timeout
+        # Requests in progress on this worker, so local duplicates can await them
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _call_store(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_idempotent_route(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        client_key = headers.get(HEADER)
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await self._send_json(send, 400, {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"})
+            return
+
+        body, receive = await self._buffer_body(receive)
+        key = hashlib.sha256(headers.get(b"authorization", b"") + b"\0" + client_key).hexdigest()
+        fingerprint = hashlib.sha256(
+            scope["method"].encode() + b"\0" + scope["path"].encode() + b"\0" + body
+        ).hexdigest()
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            claimed, record = await self._call_store(self.store.claim, key, fingerprint)
+            if claimed:
+                break
+            if record.fingerprint != fingerprint:
+                await self._send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request"})
+                return
+            if record.response is not None:
+                await self._replay(send, record.response)
+                return
+
+            response = await self._wait(key, deadline)
+            if response is not None:
+                await self._replay(send, response)
+                return
+            if time.monotonic() >= deadline:
+                await self._send_json(send, 409, {"detail": "A request with this Idempotency-Key is still in progress"})
+                return
+            # The first attempt failed and gave up its claim; try to take it
+
+        await self._run(scope, receive, send, key, fingerprint)
+
+    async def _run(self, scope, receive, send, key: str, fingerprint: str):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        captured = {"status": 500, "headers": [], "chunks": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                captured["chunks"].append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, receive, capture)
+            if should_store(captured["status"]):
+                response = StoredResponse(captured["status"], captured["headers"], b"".join(captured["chunks"]))
+        finally:
+            try:
+                if response is not None:
+                    await self._call_store(self.store.complete, key, fingerprint, response)
+                else:
+                    await self._call_store(self.store.release, key)
+            finally:
+                # Even if the store failed, local waiters must not hang; they
+                # replay the response this worker already sent
+                del self._inflight[key]
+                future.set_result(response)
+
+    async def _wait(self, key: str, deadline: float) -> Optional[StoredResponse]:
+        """Wait for the request holding ``key`` to finish and return its stored
+        response, or None if it failed or the deadline passed."""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return None
+
+        # Held by another worker: poll the shared store
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            record = await self._call_store(self.store.lookup, key)
+            if record is None:
+                return None
+            if record.response is not None:
+                return record.response
+        return None
+
+    async def _buffer_body(self, receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay_receive
+
+    async def _replay(self, send, response: StoredResponse):
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def _send_json(self, send, status_code: int, payload: dict):
+        body = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_idempotency_store() -> IdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore(SessionLocal, settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_LOCK_SECONDS)
+    return InMemoryIdempotencyStore(
+        max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    )
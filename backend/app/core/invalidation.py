@@ -0,0 +1,215 @@
+# app/core/invalidation.py
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.core.events import build_notify_listener
+from app.core.cache import cache, SPECIALIZATION_BY_NAME, DOCTOR_PROFILE, DOCTOR_AVAILABILITY, USER_STATUS
+from app.models.availability import Availability
+from app.models.doctor import Doctor
+from app.models.review import Review
+from app.models.specialization import Specialization
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+# NOTIFY payloads are capped at 8000 bytes; stay well below it
+MAX_KEYS_PER_MESSAGE = 100
+
+# Which cache entries a changed row makes stale
+_key_extractors: Dict[type, Callable[[object], Iterable[CacheKey]]] = {}
+
+
+def invalidates(model):
+    def register(extractor):
+        _key_extractors[model] = extractor
+        return extractor
+    return register
+
+
+@invalidates(Doctor)
+def _doctor_keys(doctor: Doctor):
+    yield DOCTOR_PROFILE, doctor.id
+
+
+@invalidates(User)
+def _user_keys(user: User):
+    # Token checks cache is_active; deactivation must take effect at once
+    yield USER_STATUS, user.id
+    # Doctor profiles embed the user's name
+    if user.role == "doctor" and user.doctor is not None:
+        yield DOCTOR_PROFILE, user.doctor.id
+
+
+@invalidates(Availability)
+def _availability_keys(availability: Availability):
+    yield DOCTOR_AVAILABILITY, availability.doctor_id
+
+
+@invalidates(Review)
+def _review_keys(review: Review):
+    # Doctor profiles carry the rating summary
+    yield DOCTOR_PROFILE, review.doctor_id
+
+
+@invalidates(Specialization)
+def _specialization_keys(specialization: Specialization):
+    yield SPECIALIZATION_BY_NAME, specialization.name.lower()
+
+
+class InvalidationStats:
+    def __init__(self):
+        self.published = 0
+        self.received = 0
+        self.keys_evicted = 0
+        self.last_lag_ms: Optional[float] = None
+        self.max_lag_ms = 0.0
+        self._lag_total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record_remote(self, sent_at: float, key_count: int) -> None:
+        lag_ms = max(0.0, (time.time() - sent_at) * 1000)
+        with self._lock:
+            self.received += 1
+            self.keys_evicted += key_count
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self._lag_total_ms += lag_ms
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "published": self.published,
+                "received": self.received,
+                "keys_evicted": self.keys_evicted,
+                "last_lag_ms": self.last_lag_ms,
+                "avg_lag_ms": self._lag_total_ms / self.received if self.received else None,
+                "max_lag_ms": self.max_lag_ms,
+            }
+
+
+class InvalidationBus:
+    """Carries committed cache invalidations to every worker.
+
+    ``publish`` evicts locally straight away and then tells the other
+    workers; ``receive`` applies a batch that arrived from elsewhere.
+    """
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = InvalidationStats()
+
+    def publish(self, keys: List[CacheKey]) -> None:
+        self.evict(keys)
+        self.stats.published += 1
+
+    def evict(self, keys: Iterable[CacheKey]) -> None:
+        for namespace, item_id in keys:
+            cache.invalidate(namespace, item_id)
+
+    def receive(self, message: dict) -> None:
+        if message.get("origin") == self.origin:
+            return  # already evicted when we published it
+        keys = [tuple(key) for key in message["keys"]]
+        self.evict(keys)
+        self.stats.record_remote(message["sent_at"], len(keys))
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class InMemoryInvalidationBus(InvalidationBus):
+    """Single-process bus; evictions never leave this worker."""
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """Fans invalidations out with NOTIFY; each worker LISTENs on the channel.
+
+    The NOTIFY runs on its own short-lived pooled connection because it is
+    sent from ``after_commit``, when the request's transaction is over.
+    """
+
+    def __init__(self, engine, channel: str):
+        super().__init__()
+        self.engine = engine
+        self.channel = channel
+        self.listener = build_notify_listener(settings.DATABASE_URL, channel, self.receive)
+
+    def publish(self, keys):
+        super().publish(keys)
+        sent_at = time.time()
+        try:
+            with self.engine.connect() as connection:
+                for start in range(0, len(keys), MAX_KEYS_PER_MESSAGE):
+                    payload = {
+                        "origin": self.origin,
+                        "sent_at": sent_at,
+                        "keys": [list(key) for key in keys[start:start + MAX_KEYS_PER_MESSAGE]],
+                    }
+                    connection.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": self.channel, "payload": json.dumps(payload)}
+                    )
+                connection.commit()
+        except Exception:
+            # Other workers fall back to the cache TTL; never fail the request
+            logger.exception("Could not publish cache invalidation")
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+
+
+def _collect_keys(session: Session) -> None:
+    pending: Set[CacheKey] = session.info.setdefault("cache_invalidations", set())
+    with session.no_autoflush:
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            extractor = _key_extractors.get(type(instance))
+            if extractor is None:
+                continue
+            for namespace, item_id in extractor(instance):
+                if item_id is not None:
+                    pending.add((namespace, str(item_id)))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_before_flush(session: Session, flush_context, instances) -> None:
+    # Before the flush, deleted rows and dirty relationships are still readable
+    _collect_keys(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session: Session) -> None:
+    keys = session.info.pop("cache_invalidations", None)
+    if keys:
+        bus.publish(sorted(keys))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop("cache_invalidations", None)
+
+
+def build_invalidation_bus() -> InvalidationBus:
+    if settings.CACHE_INVALIDATION_BACKEND == "postgres":
+        return PostgresInvalidationBus(engine, settings.CACHE_INVALIDATION_CHANNEL)
+    return InMemoryInvalidationBus()
+
+
+bus = build_invalidation_bus()
@@ -0,0 +1,69 @@
+# app/core/object_store.py
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+class ObjectTooLarge(Exception):
+    pass
+
+
+class ContentAddressedStore:
+    """Local blob store keyed by SHA-256 of the content.
+
+    Blobs live at ``<root>/<ab>/<cd>/<sha256>``. Uploads are streamed to a
+    temporary file in the same filesystem while being hashed, then renamed
+    into place; if the blob already exists the temporary copy is discarded,
+    so identical files are stored once.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[str, int]:
+        """Write ``chunks`` to the store; return ``(sha256, size)``."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.tmp_dir / uuid.uuid4().hex
+        hasher = hashlib.sha256()
+        size = 0
+
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ObjectTooLarge()
+                hasher.update(chunk)
+                await run_in_threadpool(handle.write, chunk)
+            await run_in_threadpool(handle.flush)
+            await run_in_threadpool(os.fsync, handle.fileno())
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        handle.close()
+
+        digest = hasher.hexdigest()
+        await run_in_threadpool(self._commit, tmp_path, digest)
+        return digest, size
+
+    def _commit(self, tmp_path: Path, digest: str) -> None:
+        final_path = self.path_for(digest)
+        if final_path.exists():
+            tmp_path.unlink(missing_ok=True)
+            return
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, final_path)
@@ -0,0 +1,123 @@
+# app/core/range_response.py
+import os
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)``.
+
+    Returns None when the header is absent or not something we serve
+    partially (multiple ranges, other units), in which case the whole file
+    is sent. Raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        suffix = int(end_text) if start_text == "" else None
+        start = int(start_text) if start_text != "" else None
+        end = int(end_text) if start_text != "" and end_text else size - 1
+    except ValueError:
+        return None  # malformed: ignore the header
+
+    if suffix is not None:
+        if suffix <= 0 or size == 0:
+            raise ValueError("unsatisfiable suffix range")
+        return max(size - suffix, 0), size - 1
+
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """File response that honours a single HTTP ``Range``.
+
+    When the server offers the ``http.response.zerocopysend`` extension the
+    body is handed over as a file descriptor (sendfile); otherwise it is read
+    and sent in chunks, never loaded whole.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        media_type: str,
+        range_header: Optional[str] = None,
+        filename: Optional[str] = None,
+        etag: Optional[str] = None,
+    ):
+        self.path = path
+        self.background = None
+        self.media_type = media_type
+        self.start, self.end = 0, size - 1
+        self.status_code = 200
+
+        headers = {
+            "accept-ranges": "bytes",
+            "content-type": media_type,
+        }
+        if etag:
+            headers["etag"] = f'"{etag}"'
+        if filename:
+            headers["content-disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            self.status_code = 416
+            self.start, self.end = 0, -1
+            headers["content-range"] = f"bytes */{size}"
+        else:
+            if byte_range is not None:
+                self.status_code = 206
+                self.start, self.end = byte_range
+                headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+
+        headers["content-length"] = str(self.end - self.start + 1)
+        self.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        count = self.end - self.start + 1
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            finally:
+                os.close(fd)
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
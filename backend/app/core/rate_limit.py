@@ -0,0 +1,150 @@
+# app/core/rate_limit.py
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import settings
+
+
+class RateLimitBackend:
+    """Storage for token buckets. ``consume`` takes one token from ``key`` and
+    returns ``(allowed, retry_after_seconds)``."""
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process token buckets, split across independently locked shards.
+
+    Each shard is an LRU capped at ``max_keys // shards`` entries, so memory
+    stays bounded no matter how many distinct IPs or emails are sprayed at
+    the login endpoint. Every check is a dict lookup plus ``move_to_end``.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000, clock=time.monotonic):
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+        self._clock = clock
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        index = hash(key) % len(self._shards)
+        buckets = self._shards[index]
+        now = self._clock()
+
+        with self._locks[index]:
+            state = buckets.get(key)
+            if state is None:
+                tokens = float(burst)
+                if len(buckets) >= self._max_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                tokens, last = state
+                tokens = min(float(burst), tokens + (now - last) * rate)
+                buckets.move_to_end(key)
+
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                return True, 0.0
+
+            buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token buckets shared by every worker, evaluated atomically in Redis.
+
+    Requires the optional ``redis`` package. Keys expire once a bucket would
+    have refilled, which bounds memory the same way the in-memory LRU does.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[self._prefix + key], args=[rate, burst, time.time()])
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+
+class LoginRateLimiter:
+    """Token buckets keyed by client IP and by account email."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_per_minute: float,
+        ip_burst: int,
+        account_per_minute: float,
+        account_burst: int,
+    ):
+        self.backend = backend
+        self.ip_rate = ip_per_minute / 60.0
+        self.ip_burst = ip_burst
+        self.account_rate = account_per_minute / 60.0
+        self.account_burst = account_burst
+
+    def check(self, ip: Optional[str], account: str) -> Optional[float]:
+        """Consume one attempt; return seconds to wait if rejected, else None."""
+        if ip:
+            allowed, retry_after = self.backend.consume(f"ip:{ip}", self.ip_rate, self.ip_burst)
+            if not allowed:
+                return retry_after
+
+        allowed, retry_after = self.backend.consume(
+            f"account:{account.strip().lower()}", self.account_rate, self.account_burst
+        )
+        if not allowed:
+            return retry_after
+        return None
+
+
+def _build_backend() -> RateLimitBackend:
+    backend = settings.LOGIN_RATE_LIMIT_BACKEND
+    if backend == "memory":
+        return InMemoryRateLimitBackend(
+            shards=settings.LOGIN_RATE_LIMIT_SHARDS,
+            max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+        )
+    if backend == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+
+    # Anything else is a "package.module:ClassName" taking no arguments.
+    module_name, _, class_name = backend.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+login_rate_limiter = LoginRateLimiter(
+    backend=_build_backend(),
+    ip_per_minute=settings.LOGIN_RATE_PER_IP_PER_MINUTE,
+    ip_burst=settings.LOGIN_RATE_IP_BURST,
+    account_per_minute=settings.LOGIN_RATE_PER_ACCOUNT_PER_MINUTE,
+    account_burst=settings.LOGIN_RATE_ACCOUNT_BURST,
+)
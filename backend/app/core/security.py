@@ -1,17 +1,35 @@
 # app/core/security.py
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.core.tracing import span
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    with span("bcrypt.hash"):
+        return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
+
+_dummy_hash: Optional[str] = None
+
+def verify_dummy_password(plain_password: str) -> bool:
+    """Spend the same bcrypt work as a real check so unknown emails can't be
+    told apart from wrong passwords by response time."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash("not-a-real-password")
+    with span("bcrypt.verify", dummy=True):
+        pwd_context.verify(plain_password, _dummy_hash)
+    return False
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -29,4 +47,47 @@ def decode_token(token: str) -> dict:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+class VerifiedTokenCache:
+    """LRU of tokens whose signature has already been checked.
+
+    Entries are dropped once the token's ``exp`` passes, so a cache hit is
+    always as valid as a fresh ``jwt.decode``.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is None:
+                return None
+            if payload.get("exp", 0) <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = decode_token(token)
+    if payload is not None:
+        token_cache.put(token, payload)
+    return payload
@@ -0,0 +1,239 @@
+# app/core/tracing.py
+import contextvars
+import hmac
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_STATEMENT_LENGTH = 500
+
+# Paths carrying a credential in a segment; traces record them masked
+REDACTED_PATHS = [
+    re.compile(r"^(.*/doctors/calendar/)[^/]+(\.ics)$"),
+]
+
+
+def redact_path(path: str) -> str:
+    for pattern in REDACTED_PATHS:
+        path = pattern.sub(r"\1{token}\2", path)
+    return path
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "attributes")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, attributes: dict):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+
+class Trace:
+    """Spans recorded for one sampled request.
+
+    Shared by the request's coroutine and the threadpool threads running its
+    sync dependencies and handler, which inherit it through contextvars.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.first_byte_ms: Optional[float] = None
+        self._ids = iter(range(1, 1 << 31))
+        self._lock = threading.Lock()
+
+    def open(self, name: str, parent_id: Optional[int], attributes: dict) -> Span:
+        with self._lock:
+            span = Span(next(self._ids), parent_id, name, attributes)
+            self.spans.append(span)
+        return span
+
+    def as_dict(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "timestamp": self.started_at,
+            "first_byte_ms": self.first_byte_ms,
+            "spans": [
+                {
+                    "id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.origin) * 1000, 3),
+                    "duration_ms": round(((span.end or span.start) - span.start) * 1000, 3),
+                    **({"attributes": span.attributes} if span.attributes else {}),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_span", default=None)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span. A no-op (one contextvar
+    lookup) when the request isn't sampled."""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    opened = trace.open(name, current_span.get(), attributes)
+    token = current_span.set(opened.span_id)
+    try:
+        yield opened
+    finally:
+        opened.end = time.perf_counter()
+        current_span.reset(token)
+
+
+class JsonLinesSink:
+    """Appends one JSON object per finished trace to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class LoggingSink:
+    def export(self, record: dict) -> None:
+        logger.info("trace %s", json.dumps(record, default=str))
+
+    def close(self) -> None:
+        pass
+
+
+class RequestTracingMiddleware:
+    """Gives every request an ``X-Request-ID`` (the client's, or a new one)
+    and records spans for a sampled fraction of them.
+
+    Sampling is decided once per request, up front: ``sample_rate`` of all
+    requests, plus any whose ``X-Trace-Sample`` header carries
+    ``force_secret``. Without a secret the header is ignored, so anonymous
+    clients can't force full SQL traces into the sink. Unsampled requests
+    only pay for the request-id header.
+    """
+
+    def __init__(self, app, sink=None, sample_rate: float = 0.0, force_secret: Optional[str] = None):
+        self.app = app
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.force_secret = force_secret.encode() if force_secret else None
+
+    def _forced(self, value: Optional[bytes]) -> bool:
+        return self.force_secret is not None and value is not None and hmac.compare_digest(value, self.force_secret)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+
+        sampled = self.sink is not None and (
+            self._forced(headers.get(b"x-trace-sample")) or random.random() < self.sample_rate
+        )
+        trace = Trace(request_id) if sampled else None
+        trace_token = current_trace.set(trace)
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trace is not None:
+                    # Handler plus serialization end here; the rest is the network
+                    trace.first_byte_ms = round((time.perf_counter() - trace.origin) * 1000, 3)
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            with span("http.request", method=scope["method"], path=redact_path(scope["path"])) as root:
+                await self.app(scope, receive, send_with_id)
+                if root is not None:
+                    root.attributes["status"] = status_code
+        finally:
+            current_trace.reset(trace_token)
+            request_id_var.reset(id_token)
+            if trace is not None:
+                try:
+                    self.sink.export(trace.as_dict())
+                except Exception:
+                    logger.exception("Could not export trace %s", request_id)
+
+
+def instrument_engine(engine) -> None:
+    """Record a span for every SQL statement run on behalf of a sampled request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        trace = current_trace.get()
+        if trace is not None:
+            conn.info.setdefault("trace_spans", []).append(
+                trace.open("sql", current_span.get(), {"statement": statement[:MAX_STATEMENT_LENGTH]})
+            )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        if current_trace.get() is None:
+            return
+        spans = conn.info.get("trace_spans")
+        if spans:
+            opened = spans.pop()
+            opened.end = time.perf_counter()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                opened.attributes["rows"] = cursor.rowcount
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if spans:
+            opened = spans.pop()
+            opened.end = time.perf_counter()
+            opened.attributes["error"] = type(context.original_exception).__name__
+
+
+def build_sink():
+    if settings.TRACING_SINK == "jsonl":
+        return JsonLinesSink(settings.TRACING_FILE)
+    if settings.TRACING_SINK == "log":
+        return LoggingSink()
+    return None
@@ -1,13 +1,16 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import HTTPConnection
 from app.config import settings
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -15,9 +18,30 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db():
+def get_db(connection: HTTPConnection):
+    # A Session checks out a pool connection on its first statement, not
+    # here, so routes that never query (cache hits, token-only checks) never
+    # touch the pool. Batch sub-requests run on a session owned by the batch
+    shared = getattr(connection.state, "db", None)
+    if shared is not None:
+        yield shared
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def release_connection(db) -> None:
+    """Give the session's connection back to the pool before slow work that
+    doesn't need it (bcrypt, file streaming, building large responses).
+
+    Call it once the handler's queries are done and any writes committed.
+    Objects already loaded stay readable but are detached, so touching an
+    unloaded relationship afterwards raises; ``db.add`` re-attaches one for
+    a later write. Further queries simply check out a connection again.
+    """
+    db.expunge_all()
+    db.rollback()
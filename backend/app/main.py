@@ -1,20 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.api.v1 import auth, doctors, appointments, availability, medical_records
+from app.database import engine
+from app.core.admission import AdmissionControlMiddleware, build_admission_controller
+from app.core.cache import cache
+from app.core.events import broker, event_listener
+from app.core.invalidation import bus as invalidation_bus
+from app.core.idempotency import IdempotencyMiddleware, build_idempotency_store
+from app.core.tracing import RequestTracingMiddleware, build_sink, instrument_engine
+from app.services.audit_service import audit_writer
+from app.services.waitlist_service import waitlist_sweeper
+from app.api.v1 import (
+    auth, doctors, patients, appointments, availability, medical_records, attachments, batch, events, waitlist,
+    reviews,
+)
+
+trace_sink = build_sink()
+if trace_sink is not None:
+    instrument_engine(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.AUDIT_ENABLED:
+        audit_writer.start()
+    broker.bind_loop(asyncio.get_running_loop())
+    if event_listener is not None:
+        event_listener.start()
+    invalidation_bus.start()
+    waitlist_sweeper.start()
+    yield
+    await asyncio.to_thread(waitlist_sweeper.stop)
+    invalidation_bus.stop()
+    if event_listener is not None:
+        event_listener.stop()
+    # Flush queued audit events before the worker exits; the join and the
+    # final flush block, so keep them off the event loop
+    await asyncio.to_thread(audit_writer.stop)
+    if trace_sink is not None:
+        trace_sink.close()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
+admission_controller = build_admission_controller(engine)
+# Batches take extra slots for the sub-requests they run concurrently
+app.state.admission_controller = admission_controller if settings.ADMISSION_ENABLED else None
+
+# Registered before CORS so that shed responses still carry CORS headers.
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission_controller,
+        retry_after=settings.ADMISSION_RETRY_AFTER,
+    )
+
+# Outside admission control so replays and waiting duplicates don't take slots.
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=build_idempotency_store(),
+        wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
+)
+
+# Outermost, so the request id and root span cover every other layer.
+app.add_middleware(
+    RequestTracingMiddleware,
+    sink=trace_sink,
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    force_secret=settings.TRACING_FORCE_SECRET,
 )
 
 app.include_router(
@@ -29,12 +100,30 @@ app.include_router(
     tags=["doctors"]
 )
 
+app.include_router(
+    patients.router,
+    prefix=f"{settings.API_V1_PREFIX}/patients",
+    tags=["patients"]
+)
+
 app.include_router(
     appointments.router,
     prefix=f"{settings.API_V1_PREFIX}/appointments",
     tags=["appointments"]
 )
 
+app.include_router(
+    waitlist.router,
+    prefix=f"{settings.API_V1_PREFIX}/waitlist",
+    tags=["waitlist"]
+)
+
+app.include_router(
+    reviews.router,
+    prefix=f"{settings.API_V1_PREFIX}/reviews",
+    tags=["reviews"]
+)
+
 app.include_router(
     availability.router,
     prefix=f"{settings.API_V1_PREFIX}/availability",
@@ -47,6 +136,24 @@ app.include_router(
     tags=["medical-records"]
 )
 
+app.include_router(
+    attachments.router,
+    prefix=f"{settings.API_V1_PREFIX}/medical-records",
+    tags=["attachments"]
+)
+
+app.include_router(
+    batch.router,
+    prefix=f"{settings.API_V1_PREFIX}/batch",
+    tags=["batch"]
+)
+
+app.include_router(
+    events.router,
+    prefix=f"{settings.API_V1_PREFIX}/events",
+    tags=["events"]
+)
+
 
 @app.get("/")
 def read_root():
@@ -55,4 +162,12 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "admission": admission_controller.stats(),
+        "audit": audit_writer.stats(),
+        "cache": cache.stats(),
+        "cache_invalidation": invalidation_bus.stats.as_dict(),
+        "event_connections": broker.connection_count(),
+        "waitlist": waitlist_sweeper.stats(),
+    }
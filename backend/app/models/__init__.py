@@ -5,6 +5,11 @@ from app.models.specialization import Specialization
 from app.models.availability import Availability
 from app.models.appointment import Appointment
 from app.models.medical_record import MedicalRecord
+from app.models.audit_log import AuditLog
+from app.models.attachment import Attachment
+from app.models.idempotency_key import IdempotencyKey
+from app.models.waitlist_entry import WaitlistEntry
+from app.models.review import Review, DoctorRatingStats
 
 __all__ = [
     "User",
@@ -14,4 +19,10 @@ __all__ = [
     "Availability",
     "Appointment",
     "MedicalRecord",
+    "AuditLog",
+    "Attachment",
+    "IdempotencyKey",
+    "WaitlistEntry",
+    "Review",
+    "DoctorRatingStats",
 ]
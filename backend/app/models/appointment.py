@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSRANGE
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -12,8 +12,14 @@ class Appointment(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
     doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False)
-    date = Column(Date, nullable=False)
+    # Partition key; part of the table's primary key, so updates by (id, date) prune
+    date = Column(Date, primary_key=True, nullable=False)
     time = Column(Time, nullable=False)
+    duration_minutes = Column(Integer, nullable=False, default=30)
+    slot = Column(
+        TSRANGE,
+        Computed("tsrange(date + time, date + time + duration_minutes * interval '1 minute')", persisted=True)
+    )
     status = Column(String, nullable=False, default="pending")
     reason = Column(String, nullable=False)
     notes = Column(String, nullable=True)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.database import Base
+
+
+class Attachment(Base):
+    __tablename__ = "medical_record_attachments"
+    __table_args__ = (
+        UniqueConstraint("medical_record_id", "sha256", name="uq_attachment_record_sha256"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    medical_record_id = Column(Integer, ForeignKey("medical_records.id", ondelete="CASCADE"), nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    medical_record = relationship("MedicalRecord", back_populates="attachments")
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Identity
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+
+from app.database import Base
+
+
+class AuditLog(Base):
+    """Append-only, monthly range-partitioned on ``occurred_at``."""
+
+    __tablename__ = "audit_log"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    occurred_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    actor_user_id = Column(UUID(as_uuid=True), nullable=True)
+    actor_role = Column(String, nullable=True)
+    action = Column(String, nullable=False)
+    resource_type = Column(String, nullable=False)
+    resource_id = Column(String, nullable=True)
+    patient_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    ip_address = Column(String, nullable=True)
+    record_count = Column(Integer, nullable=True)
+    details = Column(JSONB, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, Float, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -18,6 +18,12 @@ class Doctor(Base):
     phone = Column(String, nullable=True)
     consultation_fee = Column(Numeric(10, 2), nullable=True)
     years_of_experience = Column(Integer, nullable=True)
+    appointment_duration_minutes = Column(Integer, nullable=True)
+    clinic_latitude = Column(Float, nullable=True)
+    clinic_longitude = Column(Float, nullable=True)
+    clinic_geohash = Column(String(12), nullable=True, index=True)
+    # sha256 of the calendar feed token; the token itself is never stored
+    calendar_token_hash = Column(String(64), unique=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -26,3 +32,4 @@ class Doctor(Base):
     availability = relationship("Availability", back_populates="doctor")
     appointments = relationship("Appointment", back_populates="doctor")
     medical_records = relationship("MedicalRecord", back_populates="doctor")
+    rating_stats = relationship("DoctorRatingStats", back_populates="doctor", uselist=False)
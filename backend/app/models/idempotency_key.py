@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored response for a request made with an ``Idempotency-Key`` header.
+
+    ``status_code`` is NULL while the original request is still running.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(JSONB, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
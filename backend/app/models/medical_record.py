@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -8,6 +8,9 @@ from app.database import Base
 
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
+    __table_args__ = (
+        UniqueConstraint("doctor_id", "idempotency_key", "date", name="uq_medical_records_doctor_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -18,10 +21,13 @@ class MedicalRecord(Base):
     treatment = Column(String, nullable=False)
     prescription = Column(String, nullable=True)
     notes = Column(String, nullable=True)
-    date = Column(Date, nullable=False)
+    # Partition key; part of the table's primary key, so updates by (id, date) prune
+    date = Column(Date, primary_key=True, nullable=False)
+    idempotency_key = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     patient = relationship("Patient", back_populates="medical_records")
     doctor = relationship("Doctor", back_populates="medical_records")
     appointment = relationship("Appointment", back_populates="medical_records")
+    attachments = relationship("Attachment", back_populates="medical_record")
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Numeric, DateTime, ForeignKey, Computed
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.database import Base
+
+
+class Review(Base):
+    """A patient's rating of one completed appointment."""
+
+    __tablename__ = "reviews"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # No foreign key: appointments is partitioned and keyed on (id, date)
+    appointment_id = Column(Integer, unique=True, nullable=False)
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    rating = Column(SmallInteger, nullable=False)
+    comment = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DoctorRatingStats(Base):
+    """Running review count and rating sum per doctor, adjusted on every
+    review write (see app.services.review_service)."""
+
+    __tablename__ = "doctor_rating_stats"
+
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    average_rating = Column(
+        Numeric(3, 2),
+        Computed("CASE WHEN review_count > 0 THEN round(rating_sum::numeric / review_count, 2) END", persisted=True)
+    )
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    doctor = relationship("Doctor", back_populates="rating_stats")
@@ -11,6 +11,7 @@ class Specialization(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True)
+    default_appointment_minutes = Column(Integer, nullable=False, default=30)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     doctors = relationship("Doctor", back_populates="specialization")
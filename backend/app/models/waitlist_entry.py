@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class WaitlistEntry(Base):
+    """A patient waiting for a freed slot with one doctor on one date.
+
+    ``status`` moves waiting -> offered -> booked, or ends as expired or
+    withdrawn. While offered, ``offered_time``/``offered_minutes`` is held
+    for this patient until ``offer_expires_at``.
+    """
+
+    __tablename__ = "waitlist_entries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    earliest_time = Column(Time, nullable=False)
+    latest_time = Column(Time, nullable=False)
+    status = Column(String, nullable=False, default="waiting")
+    offered_time = Column(Time, nullable=True)
+    offered_minutes = Column(Integer, nullable=True)
+    offer_expires_at = Column(DateTime, nullable=True)
+    appointment_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
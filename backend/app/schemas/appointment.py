@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date, time, datetime
 import uuid
 
@@ -24,6 +24,7 @@ class AppointmentResponse(AppointmentBase):
     patient_id: uuid.UUID
     doctor_id: uuid.UUID
     status: str
+    duration_minutes: int = 30
     notes: Optional[str] = None
     patient_name: str
     doctor_name: str
@@ -31,3 +32,21 @@ class AppointmentResponse(AppointmentBase):
 
     class Config:
         from_attributes = True
+
+
+class AppointmentBulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=200)
+    status: str
+
+
+class AppointmentStatusResult(BaseModel):
+    id: int
+    # updated, not_found, forbidden or invalid_transition
+    result: str
+    # Status after the request; None when the appointment isn't visible
+    status: Optional[str] = None
+
+
+class AppointmentBulkStatusResponse(BaseModel):
+    updated: int
+    results: List[AppointmentStatusResult]
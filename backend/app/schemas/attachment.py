@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class AttachmentResponse(BaseModel):
+    id: int
+    medical_record_id: int
+    sha256: str
+    size_bytes: int
+    content_type: str
+    filename: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+import uuid
+
+
+class AuditEventResponse(BaseModel):
+    id: int
+    occurred_at: datetime
+    actor_user_id: Optional[uuid.UUID] = None
+    actor_role: Optional[str] = None
+    action: str
+    resource_type: str
+    resource_id: Optional[str] = None
+    record_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditEventPage(BaseModel):
+    items: List[AuditEventResponse]
+    next_cursor: Optional[str] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime, time
 from decimal import Decimal
 import uuid
 
@@ -12,6 +12,7 @@ class DoctorBase(BaseModel):
     phone: Optional[str] = None
     consultation_fee: Optional[Decimal] = None
     years_of_experience: Optional[int] = None
+    appointment_duration_minutes: Optional[int] = None
 
 
 class DoctorCreate(DoctorBase):
@@ -24,6 +25,9 @@ class DoctorUpdate(BaseModel):
     phone: Optional[str] = None
     consultation_fee: Optional[Decimal] = None
     years_of_experience: Optional[int] = None
+    appointment_duration_minutes: Optional[int] = None
+    clinic_latitude: Optional[float] = None
+    clinic_longitude: Optional[float] = None
 
 
 class DoctorResponse(BaseModel):
@@ -35,9 +39,42 @@ class DoctorResponse(BaseModel):
     phone: Optional[str] = None
     consultation_fee: Optional[Decimal] = None
     years_of_experience: Optional[int] = None
+    appointment_duration_minutes: Optional[int] = None
+    clinic_latitude: Optional[float] = None
+    clinic_longitude: Optional[float] = None
+    distance_km: Optional[float] = None
+    average_rating: Optional[float] = None
+    review_count: int = 0
     first_name: str
     last_name: str
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class NextAvailableDoctorResponse(BaseModel):
+    doctor: DoctorResponse
+    date: date
+    time: time
+    duration_minutes: int
+
+
+class DoctorPatientSummary(BaseModel):
+    patient_id: uuid.UUID
+    first_name: str
+    last_name: str
+    email: str
+    last_visit: Optional[date] = None
+    next_visit: Optional[date] = None
+    visit_count: int
+    record_count: int
+
+
+class DoctorPatientPage(BaseModel):
+    items: List[DoctorPatientSummary]
+    next_cursor: Optional[str] = None
+
+
+class CalendarFeedResponse(BaseModel):
+    url: str
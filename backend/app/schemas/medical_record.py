@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date, datetime
 import uuid
 
@@ -18,6 +18,10 @@ class MedicalRecordCreate(MedicalRecordBase):
     appointment_id: Optional[int] = None
 
 
+class MedicalRecordImport(MedicalRecordCreate):
+    idempotency_key: Optional[str] = Field(None, max_length=200)
+
+
 class MedicalRecordUpdate(MedicalRecordBase):
     pass
 
@@ -26,8 +30,22 @@ class MedicalRecordResponse(MedicalRecordBase):
     id: int
     patient_id: uuid.UUID
     doctor_id: uuid.UUID
+    appointment_id: Optional[int] = None
     doctor_name: str
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    errors: List[BulkImportError]
+    errors_truncated: bool
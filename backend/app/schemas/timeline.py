@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class TimelineItem(BaseModel):
+    type: str
+    id: int
+    occurred_at: datetime
+    title: str
+    status: Optional[str] = None
+    doctor_name: Optional[str] = None
+    details: dict = {}
+
+
+class TimelinePage(BaseModel):
+    items: List[TimelineItem]
+    next_cursor: Optional[str] = None
@@ -45,3 +45,14 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[uuid.UUID] = None
     role: Optional[str] = None
+    name: Optional[str] = None
+    patient_id: Optional[uuid.UUID] = None
+    doctor_id: Optional[uuid.UUID] = None
+
+
+class PatientClaims(TokenData):
+    patient_id: uuid.UUID
+
+
+class DoctorClaims(TokenData):
+    doctor_id: uuid.UUID
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, time, datetime
+import uuid
+
+
+class WaitlistCreate(BaseModel):
+    doctor_id: uuid.UUID
+    date: date
+    # Defaults to the whole day
+    earliest_time: Optional[time] = None
+    latest_time: Optional[time] = None
+
+
+class WaitlistEntryResponse(BaseModel):
+    id: int
+    doctor_id: uuid.UUID
+    date: date
+    earliest_time: time
+    latest_time: time
+    status: str
+    offered_time: Optional[time] = None
+    offered_minutes: Optional[int] = None
+    offer_expires_at: Optional[datetime] = None
+    appointment_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
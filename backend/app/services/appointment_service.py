@@ -0,0 +1,278 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.appointment import Appointment
+from app.models.availability import Availability
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.waitlist_entry import WaitlistEntry
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+# Target status -> statuses a doctor may move an appointment from
+STATUS_TRANSITIONS = {
+    "confirmed": ("pending",),
+    "completed": ("confirmed",),
+    "cancelled": ("pending", "confirmed"),
+}
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def resolve_duration(doctor: Doctor) -> int:
+    """Appointment length in minutes: doctor override, then specialization
+    default, then the global default."""
+    if doctor.appointment_duration_minutes:
+        return doctor.appointment_duration_minutes
+    if doctor.specialization and doctor.specialization.default_appointment_minutes:
+        return doctor.specialization.default_appointment_minutes
+    return settings.DEFAULT_APPOINTMENT_MINUTES
+
+
+def overlapping_appointments(db: Session, doctor_ids: Sequence, start: datetime, end: datetime):
+    """Active appointments whose [start, end) range overlaps the window.
+
+    Uses the generated ``slot`` tsrange column so the query is answered by
+    the same GiST index that backs the no-overlap exclusion constraint. The
+    redundant ``date`` range lets the planner skip every monthly partition
+    outside the window; appointments never span midnight, so it drops
+    nothing that overlaps.
+    """
+    return db.query(Appointment).filter(
+        Appointment.date >= start.date(),
+        Appointment.date <= end.date(),
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status.in_(ACTIVE_STATUSES),
+        Appointment.slot.overlaps(func.tsrange(start, end)),
+    )
+
+
+def held_slots(db: Session, doctor_ids: Sequence, start: datetime, end: datetime, now: datetime):
+    """Slots held for waitlisted patients that overlap the window, as
+    ``(doctor_id, patient_id, begin, end)``. ``start``/``end`` are local
+    wall time like the slots; ``now`` is UTC, like ``offer_expires_at``.
+    Holds are few and short-lived, so the overlap test runs here rather
+    than in SQL."""
+    rows = db.query(
+        WaitlistEntry.doctor_id, WaitlistEntry.patient_id, WaitlistEntry.date,
+        WaitlistEntry.offered_time, WaitlistEntry.offered_minutes
+    ).filter(
+        WaitlistEntry.doctor_id.in_(doctor_ids),
+        WaitlistEntry.status == "offered",
+        WaitlistEntry.date >= start.date(),
+        WaitlistEntry.date <= end.date(),
+        WaitlistEntry.offer_expires_at > now,
+    ).all()
+
+    holds = []
+    for doctor_id, patient_id, day, at, minutes in rows:
+        begin = datetime.combine(day, at)
+        finish = begin + timedelta(minutes=minutes)
+        if begin < end and finish > start:
+            holds.append((doctor_id, patient_id, begin, finish))
+    return holds
+
+
+def appointment_event(appointment: Appointment, event_type: str) -> dict:
+    """Push payload for an appointment change (see app.core.events)."""
+    return {
+        "type": event_type,
+        "appointment_id": appointment.id,
+        "patient_id": appointment.patient_id,
+        "doctor_id": appointment.doctor_id,
+        "date": appointment.date,
+        "time": appointment.time,
+        "status": appointment.status,
+    }
+
+
+def bulk_transition(
+    db: Session, doctor_id, ids: Sequence[int], target: str
+) -> Tuple[list, Dict[int, Tuple[str, Optional[str]]]]:
+    """Move the doctor's appointments among ``ids`` to ``target`` in one
+    ``UPDATE ... RETURNING``.
+
+    Ownership and the allowed source statuses are part of the WHERE clause,
+    so concurrent changes can't slip an invalid transition through. Returns
+    the updated rows (with the patient's user id, for notifications) and,
+    for every id left alone, why and its current status if the doctor may
+    see it. Does not commit.
+    """
+    updated = db.execute(
+        update(Appointment)
+        .where(
+            Appointment.id.in_(ids),
+            Appointment.doctor_id == doctor_id,
+            Appointment.status.in_(STATUS_TRANSITIONS[target]),
+            Appointment.patient_id == Patient.id,
+        )
+        .values(status=target, updated_at=datetime.utcnow())
+        .returning(
+            Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.date,
+            Appointment.time, Appointment.duration_minutes, Appointment.status,
+            Patient.user_id.label("patient_user_id"),
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # Only the leftovers need a second look, to say why
+    done = {row.id for row in updated}
+    rejected: Dict[int, Tuple[str, Optional[str]]] = {}
+    leftover = [appointment_id for appointment_id in ids if appointment_id not in done]
+    if leftover:
+        found = {
+            row.id: row for row in db.query(Appointment.id, Appointment.doctor_id, Appointment.status)
+            .filter(Appointment.id.in_(leftover))
+        }
+        for appointment_id in leftover:
+            row = found.get(appointment_id)
+            if row is None:
+                rejected[appointment_id] = ("not_found", None)
+            elif row.doctor_id != doctor_id:
+                rejected[appointment_id] = ("forbidden", None)
+            else:
+                rejected[appointment_id] = ("invalid_transition", row.status)
+    return updated, rejected
+
+
+class IntervalSet:
+    """Static set of half-open [start, end) intervals with O(log n) overlap checks.
+
+    Intervals are sorted by start and paired with a running maximum of end
+    values; any interval starting before ``end`` overlaps the query iff the
+    largest end among them is after ``start``. Built once per query window,
+    it answers the same question an interval tree would without per-slot
+    scans over the bookings.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        ordered = sorted(intervals)
+        self._starts = [s for s, _ in ordered]
+        self._max_ends = []
+        running = None
+        for _, e in ordered:
+            running = e if running is None or e > running else running
+            self._max_ends.append(running)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._max_ends[i - 1] > start
+
+
+def load_booked_intervals(
+    db: Session, doctor_ids: Sequence, start: datetime, end: datetime
+) -> Dict[object, IntervalSet]:
+    """One query for every doctor's bookings in the window, plus one for
+    slots held for waitlisted patients, indexed per doctor."""
+    rows = overlapping_appointments(db, doctor_ids, start, end).with_entities(
+        Appointment.doctor_id, Appointment.date, Appointment.time, Appointment.duration_minutes
+    ).all()
+
+    by_doctor = defaultdict(list)
+    for doctor_id, day, at, minutes in rows:
+        begin = datetime.combine(day, at)
+        by_doctor[doctor_id].append((begin, begin + timedelta(minutes=minutes)))
+    for doctor_id, _, begin, finish in held_slots(db, doctor_ids, start, end, datetime.utcnow()):
+        by_doctor[doctor_id].append((begin, finish))
+
+    return defaultdict(IntervalSet, {k: IntervalSet(v) for k, v in by_doctor.items()})
+
+
+def iter_free_slots(
+    windows: Iterable[Tuple[time, time]],
+    booked: IntervalSet,
+    day: date,
+    duration: int,
+    not_before: Optional[datetime] = None,
+):
+    """Yield start datetimes of free ``duration``-minute slots on ``day``, in order."""
+    step = timedelta(minutes=duration)
+    for window_start, window_end in sorted(windows):
+        cursor = datetime.combine(day, window_start)
+        limit = datetime.combine(day, window_end)
+        while cursor + step <= limit:
+            if (not_before is None or cursor >= not_before) and not booked.overlaps(cursor, cursor + step):
+                yield cursor
+            cursor += step
+
+
+def load_availability_windows(db: Session, doctor_ids: Sequence) -> Dict[object, Dict[str, list]]:
+    """One query for every doctor's weekly hours, grouped by doctor and weekday."""
+    windows = defaultdict(lambda: defaultdict(list))
+    for doctor_id, day_of_week, start_time, end_time in db.query(
+        Availability.doctor_id, Availability.day_of_week, Availability.start_time, Availability.end_time
+    ).filter(
+        Availability.doctor_id.in_(doctor_ids),
+        Availability.is_available == True
+    ).all():
+        windows[doctor_id][day_of_week].append((start_time, end_time))
+    return windows
+
+
+def _iter_doctor_slots(day_windows, booked: IntervalSet, start_date: date, days: int, duration: int, not_before):
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        windows = day_windows.get(WEEKDAYS[day.weekday()])
+        if windows:
+            yield from iter_free_slots(windows, booked, day, duration, not_before)
+
+
+def find_free_slots(
+    db: Session, doctor: Doctor, start_date: date, days: int, not_before: Optional[datetime] = None
+) -> List[Tuple[datetime, int]]:
+    """Free slots for one doctor over ``days`` days starting at ``start_date``."""
+    duration = resolve_duration(doctor)
+    windows = load_availability_windows(db, [doctor.id])[doctor.id]
+
+    window_start = datetime.combine(start_date, time.min)
+    booked = load_booked_intervals(db, [doctor.id], window_start, window_start + timedelta(days=days))[doctor.id]
+
+    return [
+        (slot_start, duration)
+        for slot_start in _iter_doctor_slots(windows, booked, start_date, days, duration, not_before)
+    ]
+
+
+def next_available(
+    db: Session, doctors: Sequence[Doctor], after: datetime, days: int, limit: int
+) -> List[Tuple[datetime, int, Doctor]]:
+    """The ``limit`` doctors with the earliest free slot at or after ``after``.
+
+    Availability and bookings for all candidates are loaded with one query
+    each; every doctor contributes only their first free slot, generated
+    lazily, and a heap keeps the ``limit`` earliest.
+    """
+    if not doctors:
+        return []
+
+    doctor_ids = [doctor.id for doctor in doctors]
+    windows = load_availability_windows(db, doctor_ids)
+    window_start = datetime.combine(after.date(), time.min)
+    booked = load_booked_intervals(db, doctor_ids, window_start, window_start + timedelta(days=days))
+
+    def first_slots():
+        for index, doctor in enumerate(doctors):
+            if doctor.id not in windows:
+                continue
+            duration = resolve_duration(doctor)
+            first = next(
+                _iter_doctor_slots(windows[doctor.id], booked[doctor.id], after.date(), days, duration, after),
+                None
+            )
+            if first is not None:
+                yield first, index, duration
+
+    return [
+        (slot_start, duration, doctors[index])
+        for slot_start, index, duration in heapq.nsmallest(limit, first_slots())
+    ]
@@ -0,0 +1,177 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Collects audit events off the request path and writes them in batches.
+
+    ``record`` only enqueues. A daemon thread drains the queue and issues one
+    multi-row INSERT whenever ``batch_size`` events are waiting or
+    ``flush_interval`` seconds have passed. When the queue is full the
+    ``overflow`` policy applies: ``"block"`` waits briefly and then writes the
+    event inline so nothing is lost, ``"drop"`` discards it and counts it.
+    ``stop`` flushes everything still queued.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        enqueue_timeout: float = 0.05,
+    ):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"Unknown audit overflow policy: {overflow}")
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Anything enqueued after the thread exited is written here
+        self._flush(self._drain(None))
+
+    def record(self, action: str, resource_type: str, **fields) -> None:
+        event = dict(fields, action=action, resource_type=resource_type)
+        event.setdefault("occurred_at", datetime.utcnow())
+
+        try:
+            self._queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == "drop":
+            self.dropped += 1
+            return
+
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._flush([event])
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _drain(self, limit: Optional[int]) -> List[dict]:
+        batch = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            self._flush(batch)
+
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._flush(batch)
+
+    def _flush(self, batch: List[dict]) -> None:
+        if not batch:
+            return
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+            self.written += len(batch)
+        except Exception:
+            db.rollback()
+            self.failed += len(batch)
+            logger.exception("Failed to write %d audit events", len(batch))
+        finally:
+            db.close()
+
+
+audit_writer = AuditWriter(
+    max_queue=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    overflow=settings.AUDIT_OVERFLOW,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT,
+)
+
+
+def record_access(action: str, resource_type: str, **fields) -> None:
+    if settings.AUDIT_ENABLED:
+        audit_writer.record(action, resource_type, **fields)
+
+
+def query_audit_events(
+    db: Session,
+    patient_id,
+    limit: int,
+    before: Optional[Tuple[datetime, int]] = None,
+    since: Optional[datetime] = None,
+) -> List[AuditLog]:
+    """Newest-first page of events about one patient.
+
+    Keyset pagination on ``(occurred_at, id)``; the ``occurred_at`` bounds
+    let Postgres prune partitions outside the requested range.
+    """
+    query = db.query(AuditLog).filter(AuditLog.patient_id == patient_id)
+    if before is not None:
+        query = query.filter(
+            AuditLog.occurred_at <= before[0],
+            tuple_(AuditLog.occurred_at, AuditLog.id) < tuple_(*before)
+        )
+    if since is not None:
+        query = query.filter(AuditLog.occurred_at >= since)
+    return query.order_by(AuditLog.occurred_at.desc(), AuditLog.id.desc()).limit(limit).all()
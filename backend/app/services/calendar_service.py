@@ -0,0 +1,229 @@
+import hashlib
+import secrets
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.database import release_connection
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.user import User
+
+# Rows fetched per query while streaming; the connection goes back to the
+# pool between chunks
+FEED_CHUNK_SIZE = 500
+
+# Bump when the rendered output changes, so cached copies are refetched
+FEED_FORMAT_VERSION = 1
+
+ICS_STATUS = {
+    "pending": "TENTATIVE",
+    "confirmed": "CONFIRMED",
+    "completed": "CONFIRMED",
+    "cancelled": "CANCELLED",
+}
+
+
+def new_feed_token() -> Tuple[str, str]:
+    """A fresh feed token and the hash stored for it; only the hash is kept."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_feed_token(token)
+
+
+def hash_feed_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def feed_window(today: date) -> Tuple[date, date]:
+    return (
+        today - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS),
+        today + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS),
+    )
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Naive UTC, whether the driver handed back an aware or naive value."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class FeedState:
+    """What a poll needs to decide between 304 and a full feed."""
+
+    def __init__(
+        self, doctor_id, doctor_name: str, last_modified: datetime, appointment_count: int, window: Tuple[date, date]
+    ):
+        self.doctor_id = doctor_id
+        self.doctor_name = doctor_name
+        self.last_modified = last_modified.replace(microsecond=0)
+        self.window = window
+        # The count catches appointments deleted from the window, which leave
+        # no newer timestamp behind
+        raw = (
+            f"{FEED_FORMAT_VERSION}:{doctor_id}:{window[0]}:{window[1]}:"
+            f"{last_modified.isoformat()}:{appointment_count}"
+        )
+        self.etag = '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+    def headers(self) -> dict:
+        return {
+            "etag": self.etag,
+            "last-modified": format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+            "cache-control": "private, no-cache",
+        }
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        # If-None-Match wins when present (RFC 9110 13.2.2)
+        if if_none_match is not None:
+            return self.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= as_utc(since)
+        return False
+
+
+def load_feed_state(db: Session, token: str, today: date) -> Optional[FeedState]:
+    """Resolve a feed token and the feed's version in one query.
+
+    The version covers everything the feed renders: the doctor's name and
+    profile, and for the appointments in the window their count, latest
+    ``updated_at`` and the latest ``updated_at`` of their patients' users
+    (names appear in each event). Appointments are read index-only from
+    ``(doctor_id, date) INCLUDE (updated_at, patient_id)``, limited to the
+    window's partitions; patients and users by primary key.
+    """
+    window = feed_window(today)
+    PatientUser = aliased(User)
+    window_stats = select(
+        func.count().label("appointment_count"),
+        func.max(Appointment.updated_at).label("latest_appointment_change"),
+        func.max(PatientUser.updated_at).label("latest_patient_change"),
+    ).select_from(Appointment).join(Patient, Appointment.patient_id == Patient.id).join(
+        PatientUser, Patient.user_id == PatientUser.id
+    ).where(
+        Appointment.doctor_id == Doctor.id,
+        Appointment.date >= window[0],
+        Appointment.date <= window[1],
+    ).lateral()
+
+    row = db.query(
+        Doctor.id, Doctor.updated_at, User.updated_at.label("user_updated_at"), User.first_name, User.last_name,
+        window_stats.c.appointment_count, window_stats.c.latest_appointment_change,
+        window_stats.c.latest_patient_change
+    ).join(User, Doctor.user_id == User.id).join(window_stats, true()).filter(
+        Doctor.calendar_token_hash == hash_feed_token(token)
+    ).first()
+    if row is None:
+        return None
+
+    changes = [
+        as_utc(moment) for moment in (
+            row.updated_at, row.user_updated_at, row.latest_appointment_change, row.latest_patient_change
+        ) if moment is not None
+    ]
+    last_modified = max(changes) if changes else datetime(2000, 1, 1)
+    return FeedState(row.id, f"{row.first_name} {row.last_name}", last_modified, row.appointment_count, window)
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """One content line, folded at 75 octets as RFC 5545 requires."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts) + "\r\n"
+
+
+def format_local(moment: datetime) -> str:
+    # Floating time: slots are clinic-local
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def format_utc(moment: datetime) -> str:
+    return moment.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(row, stamp: datetime) -> str:
+    start = datetime.combine(row.date, row.time)
+    end = start + timedelta(minutes=row.duration_minutes)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:appointment-{row.id}@{settings.CALENDAR_FEED_UID_DOMAIN}",
+        f"DTSTAMP:{format_utc(stamp)}",
+        f"DTSTART:{format_local(start)}",
+        f"DTEND:{format_local(end)}",
+        f"SUMMARY:{escape_text(f'Appointment: {row.first_name} {row.last_name}')}",
+        f"STATUS:{ICS_STATUS.get(row.status, 'CONFIRMED')}",
+    ]
+    if row.updated_at:
+        lines.append(f"LAST-MODIFIED:{format_utc(as_utc(row.updated_at))}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def iter_feed(db: Session, state: FeedState) -> Iterator[str]:
+    """The feed as chunks of text, one keyset page of appointments at a time.
+
+    Each page is one query on ``(doctor_id, date, time)``; the session's
+    connection is released before the page is rendered and sent, so a slow
+    calendar client never holds a pool connection.
+    """
+    stamp = datetime.utcnow()
+    yield "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:-//{escape_text(settings.APP_NAME)}//Doctor calendar//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(state.doctor_name)}",
+    ))
+
+    start, end = state.window
+    after = None
+    while True:
+        query = db.query(
+            Appointment.id, Appointment.date, Appointment.time, Appointment.duration_minutes,
+            Appointment.status, Appointment.updated_at, User.first_name, User.last_name
+        ).join(Patient, Appointment.patient_id == Patient.id).join(User, Patient.user_id == User.id).filter(
+            Appointment.doctor_id == state.doctor_id,
+            Appointment.date >= (after[0] if after else start),
+            Appointment.date <= end,
+        )
+        if after is not None:
+            query = query.filter(tuple_(Appointment.date, Appointment.time, Appointment.id) > after)
+        rows = query.order_by(Appointment.date, Appointment.time, Appointment.id).limit(FEED_CHUNK_SIZE).all()
+        release_connection(db)
+
+        if rows:
+            yield "".join(render_event(row, stamp) for row in rows)
+        if len(rows) < FEED_CHUNK_SIZE:
+            break
+        last = rows[-1]
+        after = (last.date, last.time, last.id)
+
+    yield "END:VCALENDAR\r\n"
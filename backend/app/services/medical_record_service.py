@@ -0,0 +1,166 @@
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.medical_record import MedicalRecord
+from app.models.patient import Patient
+from app.schemas.medical_record import MedicalRecordImport
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def check_appointment_link(db: Session, doctor_id, patient_id, appointment_id: Optional[int]) -> Optional[str]:
+    """Return an error message unless the doctor may write a record for this patient."""
+    if appointment_id is not None:
+        appointment = db.query(Appointment.doctor_id, Appointment.patient_id).filter(
+            Appointment.id == appointment_id
+        ).first()
+        if not appointment:
+            return "Appointment not found"
+        if appointment.doctor_id != doctor_id or appointment.patient_id != patient_id:
+            return "Appointment does not belong to this doctor and patient"
+        return None
+
+    has_visit = db.query(Appointment.id).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.patient_id == patient_id
+    ).first()
+    if not has_visit:
+        return "Doctor has no appointment with this patient"
+    return None
+
+
+def idempotency_key_for(line: bytes, item: MedicalRecordImport) -> str:
+    if item.idempotency_key:
+        return item.idempotency_key
+    # Retrying an export without keys still dedupes on the line's content
+    return "sha256:" + hashlib.sha256(line.strip()).hexdigest()
+
+
+class BulkImportResult:
+    def __init__(self):
+        self.created = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+
+    def error(self, line_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def parse_import_line(line_number: int, line: bytes, result: BulkImportResult):
+    try:
+        item = MedicalRecordImport.model_validate(json.loads(line))
+    except (ValueError, ValidationError) as exc:
+        message = exc.errors()[0]["msg"] if isinstance(exc, ValidationError) else "Invalid JSON"
+        result.error(line_number, message)
+        return None
+    return line_number, item, idempotency_key_for(line, item)
+
+
+def import_batch(
+    db: Session, doctor_id, batch: Sequence[Tuple[int, MedicalRecordImport, str]], result: BulkImportResult
+) -> None:
+    """Validate and insert one batch with a single multi-row INSERT.
+
+    Patients, the doctor's visits with them and the appointments referenced
+    by the batch are checked with one query each, applying the same rules
+    as ``check_appointment_link``. Rows whose idempotency key this doctor
+    already imported are counted as duplicates: keys are looked up across
+    all partitions first, since the unique index includes ``date`` and a
+    retry with a corrected date would slip past ``ON CONFLICT``, which
+    remains as the backstop for concurrent imports.
+    """
+    if not batch:
+        return
+
+    patient_ids = {item.patient_id for _, item, _ in batch}
+    known_patients = {
+        row.id for row in db.query(Patient.id).filter(Patient.id.in_(patient_ids)).all()
+    }
+    visited_patients = {
+        row.patient_id for row in db.query(Appointment.patient_id).filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.patient_id.in_(known_patients)
+        ).distinct().all()
+    } if known_patients else set()
+
+    appointment_ids = {item.appointment_id for _, item, _ in batch if item.appointment_id is not None}
+    appointments = {}
+    if appointment_ids:
+        appointments = {
+            row.id: row for row in db.query(
+                Appointment.id, Appointment.doctor_id, Appointment.patient_id
+            ).filter(Appointment.id.in_(appointment_ids)).all()
+        }
+
+    existing_keys = {
+        row.idempotency_key for row in db.query(MedicalRecord.idempotency_key).filter(
+            MedicalRecord.doctor_id == doctor_id,
+            MedicalRecord.idempotency_key.in_({key for _, _, key in batch})
+        ).all()
+    }
+
+    rows = []
+    line_for_key = {}  # idempotency key -> line number
+    for line_number, item, key in batch:
+        if item.patient_id not in known_patients:
+            result.error(line_number, "Patient not found")
+            continue
+        if item.appointment_id is not None:
+            appointment = appointments.get(item.appointment_id)
+            if appointment is None:
+                result.error(line_number, "Appointment not found")
+                continue
+            if appointment.doctor_id != doctor_id or appointment.patient_id != item.patient_id:
+                result.error(line_number, "Appointment does not belong to this doctor and patient")
+                continue
+        elif item.patient_id not in visited_patients:
+            result.error(line_number, "Doctor has no appointment with this patient")
+            continue
+        if key in line_for_key or key in existing_keys:
+            result.duplicates += 1
+            continue
+
+        line_for_key[key] = line_number
+        rows.append(dict(
+            item.model_dump(exclude={"idempotency_key"}),
+            doctor_id=doctor_id,
+            idempotency_key=key,
+        ))
+
+    if not rows:
+        return
+
+    statement = insert(MedicalRecord).values(rows).on_conflict_do_nothing(
+        index_elements=[MedicalRecord.doctor_id, MedicalRecord.idempotency_key, MedicalRecord.date]
+    ).returning(MedicalRecord.id)
+    try:
+        inserted = len(db.execute(statement).all())
+        db.commit()
+    except IntegrityError:
+        # e.g. a patient deleted mid-import; fail the batch, keep going
+        db.rollback()
+        for line_number in line_for_key.values():
+            result.error(line_number, "Could not be stored")
+        return
+
+    result.created += inserted
+    result.duplicates += len(rows) - inserted
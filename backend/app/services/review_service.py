@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.review import DoctorRatingStats
+
+
+def adjust_rating_stats(db: Session, doctor_id, count_delta: int, sum_delta: int) -> None:
+    """Apply one review write to the doctor's running totals.
+
+    A single upsert that adds the deltas in place, so concurrent reviews of
+    the same doctor serialize on the stats row instead of recomputing
+    ``AVG()``; the average is a generated column over the totals. Call it in
+    the same transaction as the review write. Does not commit.
+    """
+    statement = insert(DoctorRatingStats).values(
+        doctor_id=doctor_id,
+        review_count=count_delta,
+        rating_sum=sum_delta,
+        updated_at=datetime.utcnow(),
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[DoctorRatingStats.doctor_id],
+        set_={
+            "review_count": DoctorRatingStats.review_count + statement.excluded.review_count,
+            "rating_sum": DoctorRatingStats.rating_sum + statement.excluded.rating_sum,
+            "updated_at": statement.excluded.updated_at,
+        },
+    ))
@@ -0,0 +1,133 @@
+import base64
+import json
+import uuid
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.medical_record import MedicalRecord
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.appointment_service import ACTIVE_STATUSES
+
+ROSTER_SORTS = ("recent", "name")
+
+# Patients never seen yet sort after everyone with a past visit
+NEVER = date.min
+
+
+def encode_roster_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip("=")
+
+
+def decode_roster_cursor(cursor: str, sort: str) -> tuple:
+    """The keyset values of a cursor we issued for ``sort``, typed for the query.
+
+    Raises ValueError for anything else.
+    """
+    values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    expected = 3 if sort == "name" else 2
+    if not isinstance(values, list) or len(values) != expected or not all(isinstance(v, str) for v in values):
+        raise ValueError("Invalid cursor")
+
+    if sort == "name":
+        last_name, first_name, patient_id = values
+        return last_name, first_name, uuid.UUID(patient_id)
+    last_visit, patient_id = values
+    return date.fromisoformat(last_visit), uuid.UUID(patient_id)
+
+
+def patient_roster(
+    db: Session,
+    doctor_id,
+    today: date,
+    limit: int,
+    search: Optional[str] = None,
+    sort: str = "recent",
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of a doctor's patients with visit aggregates.
+
+    Appointments are grouped per patient in a single pass (served by the
+    ``(doctor_id, patient_id, date)`` index), records are counted the same
+    way, and the page is cut with a keyset on the sort key plus patient id.
+    """
+    visits = db.query(
+        Appointment.patient_id.label("patient_id"),
+        func.max(Appointment.date).filter(
+            Appointment.date <= today, Appointment.status != "cancelled"
+        ).label("last_visit"),
+        func.min(Appointment.date).filter(
+            Appointment.date >= today, Appointment.status.in_(ACTIVE_STATUSES)
+        ).label("next_visit"),
+        func.count().filter(Appointment.status != "cancelled").label("visit_count"),
+    ).filter(Appointment.doctor_id == doctor_id).group_by(Appointment.patient_id).subquery()
+
+    records = db.query(
+        MedicalRecord.patient_id.label("patient_id"),
+        func.count().label("record_count"),
+    ).filter(MedicalRecord.doctor_id == doctor_id).group_by(MedicalRecord.patient_id).subquery()
+
+    last_key = func.coalesce(visits.c.last_visit, literal(NEVER))
+    query = db.query(
+        visits.c.patient_id,
+        User.first_name,
+        User.last_name,
+        User.email,
+        visits.c.last_visit,
+        visits.c.next_visit,
+        visits.c.visit_count,
+        func.coalesce(records.c.record_count, 0).label("record_count"),
+        last_key.label("last_key"),
+    ).join(Patient, Patient.id == visits.c.patient_id).join(
+        User, User.id == Patient.user_id
+    ).outerjoin(records, records.c.patient_id == visits.c.patient_id)
+
+    if search:
+        pattern = f"%{search}%"
+        query = query.filter(or_(
+            User.first_name.ilike(pattern),
+            User.last_name.ilike(pattern),
+            User.email.ilike(pattern),
+            (User.first_name + " " + User.last_name).ilike(pattern),
+        ))
+
+    if sort == "name":
+        order = (User.last_name.asc(), User.first_name.asc(), visits.c.patient_id.asc())
+        if cursor:
+            query = query.filter(
+                tuple_(User.last_name, User.first_name, visits.c.patient_id) > decode_roster_cursor(cursor, sort)
+            )
+    else:
+        order = (last_key.desc(), visits.c.patient_id.desc())
+        if cursor:
+            query = query.filter(tuple_(last_key, visits.c.patient_id) < decode_roster_cursor(cursor, sort))
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if sort == "name":
+            next_cursor = encode_roster_cursor([last.last_name, last.first_name, str(last.patient_id)])
+        else:
+            next_cursor = encode_roster_cursor([last.last_key.isoformat(), str(last.patient_id)])
+
+    items = [
+        {
+            "patient_id": row.patient_id,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "email": row.email,
+            "last_visit": row.last_visit,
+            "next_visit": row.next_visit,
+            "visit_count": row.visit_count,
+            "record_count": row.record_count,
+        }
+        for row in rows
+    ]
+    return items, next_cursor
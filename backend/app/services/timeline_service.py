@@ -0,0 +1,199 @@
+import base64
+import heapq
+import itertools
+import json
+from datetime import date, datetime, time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.attachment import Attachment
+from app.models.doctor import Doctor
+from app.models.medical_record import MedicalRecord
+from app.models.user import User
+from app.schemas.timeline import TimelineItem
+from app.services.calendar_service import as_utc
+
+# A source's keyset position: the sort values of the last item consumed from it
+Position = Tuple
+
+
+class TimelineSource:
+    """One kind of timeline entry, read newest-first with keyset pagination.
+
+    ``fetch`` returns up to ``limit`` ``(position, item)`` pairs strictly
+    older than ``after``; positions must round-trip through JSON and match
+    ``position_types``. ``occurred_at`` is naive UTC for every source so
+    items from different sources compare.
+    """
+
+    name: str
+    position_types: Tuple[type, ...]
+
+    def fetch(self, db: Session, patient_id, after: Optional[Position], limit: int) -> List[Tuple[Position, TimelineItem]]:
+        raise NotImplementedError
+
+
+class AppointmentSource(TimelineSource):
+    name = "appointment"
+    position_types = (str, str, int)
+
+    def fetch(self, db, patient_id, after, limit):
+        query = db.query(
+            Appointment.id, Appointment.date, Appointment.time, Appointment.status,
+            Appointment.reason, Appointment.duration_minutes, User.first_name, User.last_name
+        ).join(Doctor, Appointment.doctor_id == Doctor.id).join(User, Doctor.user_id == User.id).filter(
+            Appointment.patient_id == patient_id
+        )
+        if after is not None:
+            after_date = date.fromisoformat(after[0])
+            query = query.filter(
+                # Row comparisons don't prune partitions; the plain bound does
+                Appointment.date <= after_date,
+                tuple_(Appointment.date, Appointment.time, Appointment.id)
+                < (after_date, time.fromisoformat(after[1]), after[2])
+            )
+        rows = query.order_by(Appointment.date.desc(), Appointment.time.desc(), Appointment.id.desc()).limit(limit)
+
+        return [
+            ((row.date.isoformat(), row.time.isoformat(), row.id), TimelineItem(
+                type=self.name,
+                id=row.id,
+                occurred_at=datetime.combine(row.date, row.time),
+                title=row.reason,
+                status=row.status,
+                doctor_name=f"{row.first_name} {row.last_name}",
+                details={"duration_minutes": row.duration_minutes},
+            ))
+            for row in rows
+        ]
+
+
+class MedicalRecordSource(TimelineSource):
+    name = "medical_record"
+    position_types = (str, int)
+
+    def fetch(self, db, patient_id, after, limit):
+        query = db.query(
+            MedicalRecord.id, MedicalRecord.date, MedicalRecord.title, MedicalRecord.diagnosis,
+            MedicalRecord.appointment_id, User.first_name, User.last_name
+        ).join(Doctor, MedicalRecord.doctor_id == Doctor.id).join(User, Doctor.user_id == User.id).filter(
+            MedicalRecord.patient_id == patient_id
+        )
+        if after is not None:
+            after_date = date.fromisoformat(after[0])
+            query = query.filter(
+                MedicalRecord.date <= after_date,
+                tuple_(MedicalRecord.date, MedicalRecord.id) < (after_date, after[1])
+            )
+        rows = query.order_by(MedicalRecord.date.desc(), MedicalRecord.id.desc()).limit(limit)
+
+        return [
+            ((row.date.isoformat(), row.id), TimelineItem(
+                type=self.name,
+                id=row.id,
+                occurred_at=datetime.combine(row.date, time.min),
+                title=row.title,
+                doctor_name=f"{row.first_name} {row.last_name}",
+                details={"diagnosis": row.diagnosis, "appointment_id": row.appointment_id},
+            ))
+            for row in rows
+        ]
+
+
+class AttachmentSource(TimelineSource):
+    name = "attachment"
+    position_types = (str, int)
+
+    def fetch(self, db, patient_id, after, limit):
+        query = db.query(
+            Attachment.id, Attachment.created_at, Attachment.filename, Attachment.content_type,
+            Attachment.size_bytes, Attachment.medical_record_id
+        ).join(MedicalRecord, Attachment.medical_record_id == MedicalRecord.id).filter(
+            MedicalRecord.patient_id == patient_id
+        )
+        if after is not None:
+            query = query.filter(
+                tuple_(Attachment.created_at, Attachment.id) < (datetime.fromisoformat(after[0]), after[1])
+            )
+        rows = query.order_by(Attachment.created_at.desc(), Attachment.id.desc()).limit(limit)
+
+        return [
+            ((row.created_at.isoformat(), row.id), TimelineItem(
+                type=self.name,
+                id=row.id,
+                # timestamptz comes back aware; the other sources are naive
+                occurred_at=as_utc(row.created_at),
+                title=row.filename,
+                details={
+                    "content_type": row.content_type,
+                    "size_bytes": row.size_bytes,
+                    "medical_record_id": row.medical_record_id,
+                },
+            ))
+            for row in rows
+        ]
+
+
+# Order also breaks ties between sources at the same timestamp
+TIMELINE_SOURCES: Dict[str, TimelineSource] = {
+    source.name: source for source in (AppointmentSource(), MedicalRecordSource(), AttachmentSource())
+}
+
+
+def encode_cursor(positions: Dict[str, Optional[Position]]) -> str:
+    raw = json.dumps(positions, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Optional[Position]]:
+    """Raises ValueError for anything that isn't a cursor we issued."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    positions = json.loads(raw)
+    if not isinstance(positions, dict) or not all(
+        name in TIMELINE_SOURCES and (value is None or _valid_position(TIMELINE_SOURCES[name], value))
+        for name, value in positions.items()
+    ):
+        raise ValueError("Invalid cursor")
+    return positions
+
+
+def _valid_position(source: TimelineSource, value) -> bool:
+    return isinstance(value, list) and len(value) == len(source.position_types) and all(
+        isinstance(part, kind) and not isinstance(part, bool) for part, kind in zip(value, source.position_types)
+    )
+
+
+def _tagged(source: TimelineSource, rank: int, entries) -> Iterator:
+    for position, item in entries:
+        yield (item.occurred_at, -rank, item.id), source.name, position, item
+
+
+def timeline_page(
+    db: Session, patient_id, limit: int, cursor: Optional[str] = None, types: Optional[Sequence[str]] = None
+) -> Tuple[List[TimelineItem], Optional[str]]:
+    """One newest-first page merged across sources.
+
+    Each source is asked for at most ``limit + 1`` rows past its own
+    position, so a page costs one indexed query per source however deep the
+    cursor is. The cursor records every source's position independently;
+    a source that contributed nothing keeps its old one (None: from the top).
+    """
+    positions = decode_cursor(cursor) if cursor else {}
+    names = [name for name in TIMELINE_SOURCES if types is None or name in types]
+
+    streams = []
+    for rank, name in enumerate(names):
+        source = TIMELINE_SOURCES[name]
+        entries = source.fetch(db, patient_id, positions.get(name), limit + 1)
+        streams.append(_tagged(source, rank, entries))
+
+    merged = list(itertools.islice(heapq.merge(*streams, key=lambda entry: entry[0], reverse=True), limit + 1))
+    page, has_more = merged[:limit], len(merged) > limit
+
+    for _, name, position, _ in page:
+        positions[name] = list(position)
+    next_cursor = encode_cursor({name: positions.get(name) for name in names}) if has_more else None
+    return [item for _, _, _, item in page], next_cursor
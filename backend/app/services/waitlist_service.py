@@ -0,0 +1,174 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.core.events import publish_event
+from app.models.patient import Patient
+from app.models.waitlist_entry import WaitlistEntry
+from app.services.appointment_service import overlapping_appointments
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUSES = ("waiting", "offered")
+
+# Offers expired per sweep transaction
+EXPIRY_BATCH = 100
+
+
+def waitlist_event(entry: WaitlistEntry, event_type: str) -> dict:
+    """Push payload for a waitlist change (see app.core.events)."""
+    return {
+        "type": event_type,
+        "waitlist_id": entry.id,
+        "doctor_id": entry.doctor_id,
+        "date": entry.date,
+        "time": entry.offered_time,
+        "duration_minutes": entry.offered_minutes,
+        "expires_at": entry.offer_expires_at,
+    }
+
+
+def local_to_utc(moment: datetime) -> datetime:
+    """Naive clinic-local wall time (how slots are stored) as naive UTC."""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def offer_slot(db: Session, doctor_id, day, start_time, minutes: int, now: datetime) -> Optional[WaitlistEntry]:
+    """Hold a freed slot for the next waiting patient whose window fits it.
+
+    Candidates are the waiting entries for the doctor and day whose window
+    covers the slot, found through the partial index on ``(doctor_id,
+    date, created_at)``. Priority combines signup order and fit: each
+    entry ranks at ``created_at + window width * WAITLIST_FLEXIBILITY_PENALTY``,
+    so a patient who can only make a narrow window goes ahead of a more
+    flexible one who signed up a little earlier. ``SKIP LOCKED`` lets
+    concurrent cancellations on the same day each take a different
+    patient. Does not commit; the offer event is sent with the caller's
+    commit.
+
+    ``now`` is naive UTC, like ``offer_expires_at``; the slot itself is
+    local wall time and is converted before the two are compared.
+    """
+    start = datetime.combine(day, start_time)
+    end = start + timedelta(minutes=minutes)
+    start_utc = local_to_utc(start)
+    if start_utc <= now or overlapping_appointments(db, [doctor_id], start, end).first() is not None:
+        return None  # in the past, or someone booked it in the meantime
+
+    entry = db.query(WaitlistEntry).filter(
+        WaitlistEntry.doctor_id == doctor_id,
+        WaitlistEntry.date == day,
+        WaitlistEntry.status == "waiting",
+        WaitlistEntry.earliest_time <= start_time,
+        WaitlistEntry.latest_time >= end.time(),
+    ).order_by(
+        WaitlistEntry.created_at
+        + (WaitlistEntry.latest_time - WaitlistEntry.earliest_time) * settings.WAITLIST_FLEXIBILITY_PENALTY,
+        WaitlistEntry.created_at,
+        WaitlistEntry.id,
+    ).with_for_update(skip_locked=True).first()
+    if entry is None:
+        return None
+
+    entry.status = "offered"
+    entry.offered_time = start_time
+    entry.offered_minutes = minutes
+    # Never hold a slot past its own start
+    entry.offer_expires_at = min(now + timedelta(minutes=settings.WAITLIST_HOLD_MINUTES), start_utc)
+    db.flush()
+
+    patient_user_id = db.query(Patient.user_id).filter(Patient.id == entry.patient_id).scalar()
+    publish_event(db, [patient_user_id], waitlist_event(entry, "waitlist.offered"))
+    return entry
+
+
+def offer_freed_appointment(db: Session, appointment, now: datetime) -> Optional[WaitlistEntry]:
+    """Offer a just-cancelled appointment's slot; ``appointment`` must be flushed."""
+    return offer_slot(
+        db, appointment.doctor_id, appointment.date, appointment.time, appointment.duration_minutes, now
+    )
+
+
+def release_offer(db: Session, entry: WaitlistEntry, status: str, now: datetime) -> Optional[WaitlistEntry]:
+    """End ``entry`` with ``status`` and pass any slot it held to the next patient."""
+    held = entry.status == "offered"
+    entry.status = status
+    db.flush()
+    if held:
+        return offer_slot(db, entry.doctor_id, entry.date, entry.offered_time, entry.offered_minutes, now)
+    return None
+
+
+def expire_offers(db: Session, now: datetime) -> int:
+    """Expire up to EXPIRY_BATCH unanswered offers, re-offering each slot."""
+    expired = db.query(WaitlistEntry).filter(
+        WaitlistEntry.status == "offered",
+        WaitlistEntry.offer_expires_at <= now,
+    ).order_by(WaitlistEntry.offer_expires_at).limit(EXPIRY_BATCH).with_for_update(skip_locked=True).all()
+
+    for entry in expired:
+        patient_user_id = db.query(Patient.user_id).filter(Patient.id == entry.patient_id).scalar()
+        publish_event(db, [patient_user_id], waitlist_event(entry, "waitlist.expired"))
+        release_offer(db, entry, "expired", now)
+    return len(expired)
+
+
+class WaitlistSweeper:
+    """Expires unanswered offers off the request path.
+
+    A daemon thread wakes every ``interval`` seconds; each worker runs one,
+    and ``SKIP LOCKED`` keeps them from expiring the same offer twice.
+    """
+
+    def __init__(self, session_factory=SessionLocal, interval: float = 5.0):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.expired = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="waitlist-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            while self.sweep() == EXPIRY_BATCH:
+                pass
+
+    def sweep(self) -> int:
+        db = self.session_factory()
+        try:
+            count = expire_offers(db, datetime.utcnow())
+            db.commit()
+            self.expired += count
+            return count
+        except Exception:
+            db.rollback()
+            self.failed += 1
+            logger.exception("Waitlist sweep failed")
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {"expired": self.expired, "failed": self.failed}
+
+
+waitlist_sweeper = WaitlistSweeper(interval=settings.WAITLIST_SWEEP_INTERVAL)
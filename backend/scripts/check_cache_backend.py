@@ -0,0 +1,51 @@
+"""Round-trip check for the configured cache backend.
+
+Usage:
+    CACHE_BACKEND=redis python scripts/check_cache_backend.py
+
+Runs ``get_or_load``, ``invalidate`` and ``get_or_load`` again on a
+throwaway key against the real backend (memory, redis or a custom class),
+the same sequence a doctor profile goes through when it is edited. Exits
+non-zero if a read fails or the invalidated value is served again.
+"""
+import os
+import sys
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.cache import ReadThroughCache, _build_backend
+
+NAMESPACE = "cache_check"
+
+
+def main():
+    cache = ReadThroughCache(_build_backend(), default_ttl=60)
+    item_id = uuid.uuid4().hex
+
+    first = cache.get_or_load(NAMESPACE, item_id, lambda: "before")
+    cached = cache.get_or_load(NAMESPACE, item_id, lambda: "not cached")
+    cache.invalidate(NAMESPACE, item_id)
+    reloaded = cache.get_or_load(NAMESPACE, item_id, lambda: "after")
+    cache.invalidate(NAMESPACE, item_id)
+    again = cache.get_or_load(NAMESPACE, item_id, lambda: "after second invalidation")
+
+    results = [
+        ("first load", first, "before"),
+        ("cached read", cached, "before"),
+        ("read after invalidate", reloaded, "after"),
+        ("read after second invalidate", again, "after second invalidation"),
+    ]
+    failed = False
+    for label, got, expected in results:
+        ok = got == expected
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {got!r}")
+
+    print(f"backend: {settings.CACHE_BACKEND}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
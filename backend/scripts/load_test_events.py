@@ -0,0 +1,99 @@
+"""Hold many idle SSE connections open against /api/v1/events/stream.
+
+Usage:
+    python scripts/load_test_events.py --url http://localhost:8000 --token <jwt> --connections 5000
+
+Uses raw asyncio sockets so the client itself stays cheap. Reports how many
+connections were established, how many are still open at the end, and how
+many keepalives/events arrived. Watch the server's RSS and /health
+(``event_connections``) while it runs.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.open = 0
+        self.keepalives = 0
+        self.events = 0
+
+
+async def hold_connection(host: str, port: int, path: str, token: str, deadline: float, stats: Stats):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+
+    request = (
+        f"GET {path}?token={token} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Accept: text/event-stream\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    )
+    writer.write(request.encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if b" 200 " not in status_line:
+        stats.failed += 1
+        writer.close()
+        return
+
+    stats.connected += 1
+    stats.open += 1
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            line = await asyncio.wait_for(reader.readline(), timeout=remaining)
+            if not line:
+                break
+            if line.startswith(b": keepalive"):
+                stats.keepalives += 1
+            elif line.startswith(b"event:"):
+                stats.events += 1
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        stats.open -= 1
+        writer.close()
+
+
+async def main(args):
+    url = urlsplit(args.url)
+    host = url.hostname or "localhost"
+    port = url.port or 80
+    path = "/api/v1/events/stream"
+
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    tasks = []
+    for _ in range(args.connections):
+        tasks.append(asyncio.create_task(hold_connection(host, port, path, args.token, deadline, stats)))
+        # Ramp up gently so the accept backlog doesn't overflow
+        await asyncio.sleep(1 / args.ramp)
+
+    print(f"Opened {stats.connected} connections ({stats.failed} failed); holding...")
+    while any(not task.done() for task in tasks):
+        await asyncio.sleep(5)
+        print(f"open={stats.open} keepalives={stats.keepalives} events={stats.events}")
+
+    print(f"Done. connected={stats.connected} failed={stats.failed} "
+          f"keepalives={stats.keepalives} events={stats.events}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Idle SSE connection load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Access token from /api/v1/auth/login")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to hold connections")
+    parser.add_argument("--ramp", type=float, default=500.0, help="New connections per second")
+    asyncio.run(main(parser.parse_args()))
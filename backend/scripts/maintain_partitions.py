@@ -0,0 +1,125 @@
+"""Create upcoming monthly partitions and archive settled old months.
+
+appointments and medical_records are range-partitioned by month on
+``date`` (see the 20261019170000 migration). Run this monthly, from cron
+or a scheduled job:
+
+    python scripts/maintain_partitions.py
+    python scripts/maintain_partitions.py --archive-after-months 24 --dry-run
+
+Each run:
+- creates partitions for the next --months-ahead months, so new rows
+  never land in the default partition
+- archives every hot month older than --archive-after-months with
+  ``archive_partition()``, one transaction per month. The month is
+  rewritten compressed into the ``archive`` schema and stays attached, so
+  history endpoints still read it. An appointment month with pending or
+  confirmed rows is skipped until they are settled.
+- VACUUM (FREEZE, ANALYZE) each newly archived partition, since it is
+  never written again
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.database import engine
+
+PARTITIONED_TABLES = ("appointments", "medical_records")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def hot_months(connection, parent: str, before: date):
+    """Months of ``parent`` still in the public schema, older than ``before``."""
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE i.inhparent = CAST(:parent AS regclass) AND n.nspname = 'public' "
+        "ORDER BY c.relname"
+    ), {"parent": f"public.{parent}"})
+
+    months = []
+    for (name,) in rows:
+        suffix = name[len(parent) + 1:]
+        if suffix == "default":
+            continue
+        year, month = suffix.split("_")
+        start = date(int(year), int(month), 1)
+        if start < before:
+            months.append(start)
+    return months
+
+
+def create_partitions(months_ahead: int, dry_run: bool) -> None:
+    this_month = date.today().replace(day=1)
+    last = add_months(this_month, months_ahead)
+    if dry_run:
+        print(f"would ensure partitions through {last:%Y-%m}")
+        return
+
+    with engine.begin() as connection:
+        for parent in PARTITIONED_TABLES:
+            for offset in range(months_ahead + 1):
+                # A no-op for months that already exist, hot or archived
+                connection.execute(
+                    text("SELECT create_monthly_partition(:parent, :month)"),
+                    {"parent": parent, "month": add_months(this_month, offset)}
+                )
+    print(f"partitions ensured through {last:%Y-%m}")
+
+
+def archive_months(archive_after_months: int, dry_run: bool) -> None:
+    cutoff = add_months(date.today().replace(day=1), -archive_after_months)
+    with engine.connect() as connection:
+        candidates = [
+            (parent, month) for parent in PARTITIONED_TABLES for month in hot_months(connection, parent, cutoff)
+        ]
+
+    if not candidates:
+        print(f"nothing to archive before {cutoff:%Y-%m}")
+        return
+
+    for parent, month in candidates:
+        name = f"{parent}_{month:%Y_%m}"
+        if dry_run:
+            print(f"would archive {name}")
+            continue
+
+        with engine.begin() as connection:
+            moved = connection.execute(
+                text("SELECT archive_partition(:parent, :month)"), {"parent": parent, "month": month}
+            ).scalar()
+        if moved is None:
+            print(f"skipped {name}: pending or confirmed appointments remain")
+            continue
+
+        # VACUUM can't run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f'VACUUM (FREEZE, ANALYZE) archive."{name}"'))
+        print(f"archived {name}: {moved} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly partition upkeep and cold archival")
+    parser.add_argument("--months-ahead", type=int, default=12, help="Create partitions this far ahead")
+    parser.add_argument("--archive-after-months", type=int, default=24, help="Archive months older than this")
+    parser.add_argument("--no-archive", action="store_true", help="Only create upcoming partitions")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change")
+    args = parser.parse_args()
+
+    create_partitions(args.months_ahead, args.dry_run)
+    if not args.no_archive:
+        archive_months(args.archive_after_months, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
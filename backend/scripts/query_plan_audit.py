@@ -0,0 +1,401 @@
+"""Capture the SQL each API route issues and EXPLAIN it against a seeded database.
+
+Point it at a disposable local database that has been migrated and seeded
+(scripts/seed_data.py, plus as much volume as you can generate):
+
+    DATABASE_URL=postgresql://localhost/medconnect_plans python scripts/query_plan_audit.py
+
+Every scenario below is run in-process through the real app. Each SELECT,
+UPDATE and DELETE it issues is EXPLAINed, and the tool flags:
+- sequential scans of tables above --min-rows
+- sorts over more than --min-rows rows
+
+Each flagged plan gets a proposed composite (equality columns, then sort
+or range columns) or partial (boolean/status predicates) index, unless an
+existing index already leads with those columns.
+
+--strict disables seq scans and sorts in the planner, so whatever
+survives has no usable index. This makes a small seed database useful.
+
+--baseline compares findings against a stored set and exits 1 on new
+ones (a plan regression). --write-migration writes the proposals to a
+versioned file in supabase/migrations/.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every read must reach the database, and nothing may run in the background
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("AUDIT_ENABLED", "false")
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+from sqlalchemy import event, text
+
+from app.config import settings
+from app.database import engine
+from app.main import app
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "supabase", "migrations")
+
+# (name, login as, method, path, body, writes)
+SCENARIOS = [
+    ("doctors.search", None, "GET", "/doctors/search?name=a", None, False),
+    ("doctors.search.specialization", None, "GET", "/doctors/search?specialization=a", None, False),
+    ("doctors.next_available", None, "GET", "/doctors/next-available", None, False),
+    ("doctors.get", None, "GET", "/doctors/{doctor_id}", None, False),
+    ("availability.doctor", None, "GET", "/availability/doctor/{doctor_id}", None, False),
+    ("availability.slots", None, "GET", "/availability/doctor/{doctor_id}/slots?days=7", None, False),
+    ("availability.my", "doctor", "GET", "/availability/my", None, False),
+    ("appointments.my.patient", "patient", "GET", "/appointments/my", None, False),
+    ("appointments.my.doctor", "doctor", "GET", "/appointments/my", None, False),
+    ("medical_records.my", "patient", "GET", "/medical-records/my", None, False),
+    ("medical_records.access_log", "patient", "GET", "/medical-records/my/access-log", None, False),
+    ("auth.profile", "doctor", "GET", "/auth/profile", None, False),
+    ("appointments.book", "patient", "POST", "/appointments", {
+        "doctor_id": "{doctor_id}",
+        "date": "{tomorrow}",
+        "time": "10:00:00",
+        "reason": "Query plan audit",
+    }, True),
+]
+
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+current_route = contextvars.ContextVar("current_route", default=None)
+captured = defaultdict(list)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def capture_statement(conn, cursor, statement, parameters, context, executemany):
+    route = current_route.get()
+    if route is None or executemany:
+        return
+    if statement.lstrip().upper().startswith(EXPLAINABLE) and not statement.lstrip().upper().startswith("EXPLAIN"):
+        captured[route].append((statement, parameters))
+
+
+async def call(method, path, token=None, body=None, form=None):
+    """Run one request through the full ASGI app and return (status, json)."""
+    if form is not None:
+        raw = urlencode(form).encode()
+        content_type = b"application/x-www-form-urlencoded"
+    else:
+        raw = b"" if body is None else json.dumps(body).encode()
+        content_type = b"application/json"
+
+    path, _, query_string = path.partition("?")
+    headers = [(b"content-type", content_type), (b"content-length", str(len(raw)).encode())]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": settings.API_V1_PREFIX + path,
+        "raw_path": (settings.API_V1_PREFIX + path).encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response = {"status": 500, "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    payload = b"".join(response["chunks"])
+    try:
+        return response["status"], json.loads(payload) if payload else None
+    except ValueError:
+        return response["status"], None
+
+
+def fill(value, variables):
+    if isinstance(value, str):
+        return value.format(**variables)
+    if isinstance(value, dict):
+        return {key: fill(item, variables) for key, item in value.items()}
+    return value
+
+
+async def run_scenarios(args):
+    tokens = {}
+    for role, email, password in (("patient", args.patient_email, args.patient_password),
+                                  ("doctor", args.doctor_email, args.doctor_password)):
+        status, payload = await call("POST", "/auth/login", form={"username": email, "password": password})
+        if status != 200:
+            sys.exit(f"Could not log in as {role} {email} ({status}); is the database seeded?")
+        tokens[role] = payload["access_token"]
+
+    status, doctors = await call("GET", "/doctors/search")
+    if status != 200 or not doctors:
+        sys.exit("No doctors found; is the database seeded?")
+    variables = {"doctor_id": doctors[0]["id"], "tomorrow": (date.today() + timedelta(days=1)).isoformat()}
+
+    for name, role, method, path, body, writes in SCENARIOS:
+        if writes and not args.include_writes:
+            continue
+        token = current_route.set(name)
+        try:
+            status, _ = await call(method, fill(path, variables), tokens.get(role), fill(body, variables))
+        finally:
+            current_route.reset(token)
+        print(f"{status} {method} {path} ({name}): {len(captured[name])} statements")
+
+
+def walk(node, ancestors=()):
+    yield node, ancestors
+    for child in node.get("Plans", []):
+        yield from walk(child, ancestors + (node,))
+
+
+def scanned_relation(node):
+    for child, _ in walk(node):
+        if "Relation Name" in child:
+            return child["Relation Name"]
+    return None
+
+
+COMPARISON = re.compile(
+    r"\(?(\w+)\)?(?:::[\w ]+)?\s+(=|<=|>=|<>|<|>|~~\*?)\s+(ANY\s+\()?"
+    r"('(?:[^']|'')*'|true|false|-?\d+(?:\.\d+)?)"
+)
+
+
+def parse_filter(expression):
+    """Split a plan Filter into equality columns, range columns and
+    predicates worth turning into a partial index."""
+    equality, ranges, partial = [], [], []
+    for column, op, any_, value in COMPARISON.findall(expression or ""):
+        if op == "=" and value in ("true", "false"):
+            partial.append(column if value == "true" else f"NOT {column}")
+        elif op == "=" and any_ and column == "status":
+            values = value.strip("'").split("::")[0].strip("{}").split(",")
+            partial.append(f"{column} IN ({', '.join(repr(item) for item in values)})")
+        elif op == "=":
+            equality.append(column)
+        elif op in ("<", "<=", ">", ">="):
+            ranges.append(column)
+    dedupe = lambda items: list(dict.fromkeys(items))
+    return dedupe(equality), dedupe(ranges), dedupe(partial)
+
+
+def sort_columns(sort_node):
+    columns = []
+    for key in sort_node.get("Sort Key", []):
+        column = key.split(".")[-1].replace("(", "").replace(")", "").replace('"', "")
+        columns.append(column)
+    return columns
+
+
+def load_partition_parents(connection):
+    """Partition name -> partitioned table, so plans on partitions are
+    reported (and indexed) against the table the code queries."""
+    rows = connection.execute(text(
+        "SELECT c.relname, p.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relkind = 'p'"
+    ))
+    return {child: parent for child, parent in rows}
+
+
+def load_table_sizes(connection, parents):
+    rows = connection.execute(text(
+        "SELECT c.relname, greatest(c.reltuples, 0)::bigint FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname IN ('public', 'archive') AND c.relkind = 'r'"
+    ))
+    sizes = defaultdict(int)
+    for name, size in rows:
+        sizes[parents.get(name, name)] += size
+    return sizes
+
+
+def load_index_columns(connection):
+    indexes = defaultdict(list)
+    rows = connection.execute(text("SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = 'public'"))
+    for table, definition in rows:
+        match = re.search(r"USING \w+ \((.+?)\)(?: WHERE|$)", definition)
+        if match:
+            columns = [part.strip().split(" ")[0].strip('"') for part in match.group(1).split(",")]
+            indexes[table].append(columns)
+    return indexes
+
+
+def explain(statement, parameters, strict):
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if strict:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        return cursor.fetchone()[0][0]["Plan"]
+    finally:
+        raw.rollback()
+        raw.close()
+
+
+def analyse(args):
+    with engine.connect() as connection:
+        parents = load_partition_parents(connection)
+        sizes = load_table_sizes(connection, parents)
+        indexes = load_index_columns(connection)
+
+    findings = defaultdict(set)  # route -> {finding key}
+    proposals = {}  # index name -> (table, columns, predicate, routes)
+
+    for route, statements in captured.items():
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = explain(statement, parameters, args.strict)
+
+            for node, ancestors in walk(plan):
+                node_type = node["Node Type"]
+                if node_type == "Seq Scan":
+                    table = parents.get(node["Relation Name"], node["Relation Name"])
+                    if not args.strict and sizes.get(table, 0) < args.min_rows:
+                        continue
+                    findings[route].add(f"Seq Scan on {table}")
+                    sort = next((a for a in reversed(ancestors) if a["Node Type"] in ("Sort", "Incremental Sort")), None)
+                    propose(proposals, indexes, route, table, node.get("Filter"), sort)
+                elif node_type == "Sort":
+                    table = scanned_relation(node)
+                    table = parents.get(table, table)
+                    if not args.strict and node.get("Plan Rows", 0) < args.min_rows:
+                        continue
+                    findings[route].add(f"Sort on {table} by {', '.join(node.get('Sort Key', []))}")
+
+    return findings, proposals
+
+
+def propose(proposals, indexes, route, table, filter_expression, sort_node):
+    equality, ranges, partial = parse_filter(filter_expression)
+    columns = equality + (sort_columns(sort_node) if sort_node else ranges[:1])
+    columns = list(dict.fromkeys(columns))
+    if not columns:
+        return
+
+    plain = [column.split(" ")[0] for column in columns]
+    for existing in indexes.get(table, []):
+        if existing[:len(plain)] == plain:
+            return
+
+    predicate = " AND ".join(partial) if partial else None
+    name = f"idx_{table}_{'_'.join(plain)}{'_partial' if predicate else ''}"[:63]
+    entry = proposals.setdefault(name, (table, columns, predicate, set()))
+    entry[3].add(route)
+
+
+def render_migration(findings, proposals, args):
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    lines = [
+        "/*",
+        f"  # Index advisor ({stamp})",
+        "",
+        "  Generated by scripts/query_plan_audit.py from EXPLAIN plans of the",
+        f"  API's queries ({'strict' if args.strict else f'tables over {args.min_rows} rows'}).",
+        "",
+        "  1. Findings",
+    ]
+    for route in sorted(findings):
+        for finding in sorted(findings[route]):
+            lines.append(f"    - `{route}`: {finding}")
+    lines += ["", "  2. New Indexes"]
+    for name, (table, columns, predicate, routes) in sorted(proposals.items()):
+        lines.append(f"    - `{name}` - for {', '.join(sorted(routes))}")
+    lines += ["*/", ""]
+    for name, (table, columns, predicate, routes) in sorted(proposals.items()):
+        statement = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        if predicate:
+            statement += f" WHERE {predicate}"
+        lines.append(statement + ";")
+    return f"{stamp}_index_advisor.sql", "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every route's SQL and propose indexes")
+    parser.add_argument("--min-rows", type=int, default=1000, help="Ignore scans/sorts smaller than this")
+    parser.add_argument("--strict", action="store_true", help="Flag anything no index can serve, at any size")
+    parser.add_argument("--include-writes", action="store_true", help="Also run write scenarios (booking)")
+    parser.add_argument("--baseline", help="JSON file of accepted findings; new findings exit 1")
+    parser.add_argument("--update-baseline", action="store_true", help="Rewrite --baseline with current findings")
+    parser.add_argument("--write-migration", action="store_true", help="Write proposals to supabase/migrations")
+    parser.add_argument("--patient-email", default="john.doe@example.com")
+    parser.add_argument("--patient-password", default="patient123")
+    parser.add_argument("--doctor-email", default="dr.smith@example.com")
+    parser.add_argument("--doctor-password", default="doctor123")
+    args = parser.parse_args()
+
+    asyncio.run(run_scenarios(args))
+    findings, proposals = analyse(args)
+
+    print()
+    for route in sorted(findings):
+        for finding in sorted(findings[route]):
+            print(f"FLAG {route}: {finding}")
+    for name, (table, columns, predicate, routes) in sorted(proposals.items()):
+        where = f" WHERE {predicate}" if predicate else ""
+        print(f"PROPOSE {name} ON {table} ({', '.join(columns)}){where}")
+    if not findings:
+        print("No flagged plans.")
+
+    if args.write_migration and proposals:
+        filename, sql = render_migration(findings, proposals, args)
+        path = os.path.join(MIGRATIONS_DIR, filename)
+        with open(path, "w") as handle:
+            handle.write(sql)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        current = {route: sorted(items) for route, items in findings.items()}
+        if args.update_baseline or not os.path.exists(args.baseline):
+            with open(args.baseline, "w") as handle:
+                json.dump(current, handle, indent=2, sort_keys=True)
+            print(f"Baseline written to {args.baseline}")
+            return
+
+        with open(args.baseline) as handle:
+            accepted = json.load(handle)
+        regressions = [
+            (route, finding) for route, items in current.items()
+            for finding in items if finding not in accepted.get(route, [])
+        ]
+        for route, finding in regressions:
+            print(f"REGRESSION {route}: {finding}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+/*
+  # Appointment durations and overlap protection
+
+  1. Changes
+    - `specializations.default_appointment_minutes` (integer, default 30)
+    - `doctors.appointment_duration_minutes` (integer, nullable) - per-doctor override
+    - `appointments.duration_minutes` (integer, default 30)
+    - `appointments.slot` (tsrange, generated) - [date + time, date + time + duration)
+
+  2. Constraints
+    - `appointments_no_overlap`: no two pending/confirmed appointments of the
+      same doctor may have overlapping slots (GiST exclusion constraint)
+
+  3. Notes
+    - Existing active appointments that already overlap must be resolved
+      before this migration runs; find them with:
+        SELECT a.id, b.id FROM appointments a JOIN appointments b
+          ON a.doctor_id = b.doctor_id AND a.id < b.id AND a.slot && b.slot
+         WHERE a.status IN ('pending', 'confirmed') AND b.status IN ('pending', 'confirmed');
+*/
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE specializations
+  ADD COLUMN IF NOT EXISTS default_appointment_minutes integer NOT NULL DEFAULT 30
+  CHECK (default_appointment_minutes > 0);
+
+ALTER TABLE doctors
+  ADD COLUMN IF NOT EXISTS appointment_duration_minutes integer
+  CHECK (appointment_duration_minutes > 0);
+
+ALTER TABLE appointments
+  ADD COLUMN IF NOT EXISTS duration_minutes integer NOT NULL DEFAULT 30
+  CHECK (duration_minutes > 0);
+
+ALTER TABLE appointments
+  ADD COLUMN IF NOT EXISTS slot tsrange
+  GENERATED ALWAYS AS (tsrange(date + time, date + time + duration_minutes * interval '1 minute')) STORED;
+
+ALTER TABLE appointments
+  ADD CONSTRAINT appointments_no_overlap
+  EXCLUDE USING gist (doctor_id WITH =, slot WITH &&)
+  WHERE (status IN ('pending', 'confirmed'));
@@ -0,0 +1,28 @@
+/*
+  # Doctor clinic location
+
+  1. Changes
+    - `doctors.clinic_latitude` (double precision, nullable)
+    - `doctors.clinic_longitude` (double precision, nullable)
+    - `doctors.clinic_geohash` (text, nullable) - geohash of the clinic, 9 characters
+
+  2. Indexes
+    - `clinic_geohash` with text_pattern_ops so the prefix filters used by
+      "near me" search are answered by index range scans
+    - `(specialization_id, clinic_geohash)` for specialization + proximity searches
+
+  3. Notes
+    - The geohash is computed by the API whenever coordinates change; no
+      PostGIS or earthdistance extension is required.
+*/
+
+ALTER TABLE doctors ADD COLUMN IF NOT EXISTS clinic_latitude double precision
+  CHECK (clinic_latitude BETWEEN -90 AND 90);
+ALTER TABLE doctors ADD COLUMN IF NOT EXISTS clinic_longitude double precision
+  CHECK (clinic_longitude BETWEEN -180 AND 180);
+ALTER TABLE doctors ADD COLUMN IF NOT EXISTS clinic_geohash text;
+
+CREATE INDEX IF NOT EXISTS idx_doctors_clinic_geohash
+  ON doctors (clinic_geohash text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_doctors_specialization_geohash
+  ON doctors (specialization_id, clinic_geohash text_pattern_ops);
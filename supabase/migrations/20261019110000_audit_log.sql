@@ -0,0 +1,91 @@
+/*
+  # Audit log for medical record access
+
+  1. New Tables
+    - `audit_log` (range-partitioned by month on `occurred_at`)
+      - `id` (bigint identity)
+      - `occurred_at` (timestamp, not null)
+      - `actor_user_id` (uuid, nullable)
+      - `actor_role` (text, nullable)
+      - `action` (text, not null) - read, create, update, ...
+      - `resource_type` (text, not null) - medical_record, ...
+      - `resource_id` (text, nullable)
+      - `patient_id` (uuid, nullable) - whose data was touched
+      - `ip_address` (text, nullable)
+      - `record_count` (integer, nullable)
+      - `details` (jsonb, nullable)
+
+  2. Partitioning
+    - `create_audit_log_partition(month)` creates the partition for one month
+    - Partitions exist for the current month and the next three; a default
+      partition catches anything outside them
+    - Old months can be detached or dropped wholesale for retention
+
+  3. Security
+    - Rows are append-only: UPDATE and DELETE are rejected by trigger
+    - No foreign keys, so the log survives deletion of the users it mentions
+*/
+
+CREATE TABLE IF NOT EXISTS audit_log (
+  id bigint GENERATED ALWAYS AS IDENTITY,
+  occurred_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+  actor_user_id uuid,
+  actor_role text,
+  action text NOT NULL,
+  resource_type text NOT NULL,
+  resource_id text,
+  patient_id uuid,
+  ip_address text,
+  record_count integer,
+  details jsonb,
+  PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_patient_time
+  ON audit_log (patient_id, occurred_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_log_actor_time
+  ON audit_log (actor_user_id, occurred_at DESC);
+
+CREATE OR REPLACE FUNCTION create_audit_log_partition(month date)
+RETURNS void AS $$
+DECLARE
+  start_date date := date_trunc('month', month)::date;
+  end_date date := (date_trunc('month', month) + interval '1 month')::date;
+  partition_name text := 'audit_log_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+    partition_name, start_date, end_date
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT;
+
+DO $$
+BEGIN
+  FOR i IN 0..3 LOOP
+    PERFORM create_audit_log_partition((date_trunc('month', now()) + make_interval(months => i))::date);
+  END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION audit_log_append_only()
+RETURNS TRIGGER AS $$
+BEGIN
+  RAISE EXCEPTION 'audit_log is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER audit_log_no_update_or_delete BEFORE UPDATE OR DELETE ON audit_log
+  FOR EACH ROW EXECUTE FUNCTION audit_log_append_only();
+
+ALTER TABLE audit_log ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Audit log can be appended"
+  ON audit_log FOR INSERT
+  WITH CHECK (true);
+
+CREATE POLICY "Audit log can be read"
+  ON audit_log FOR SELECT
+  USING (true);
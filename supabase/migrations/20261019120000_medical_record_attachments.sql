@@ -0,0 +1,46 @@
+/*
+  # Medical record attachments
+
+  1. New Tables
+    - `medical_record_attachments`
+      - `id` (serial, primary key)
+      - `medical_record_id` (integer, foreign key to medical_records)
+      - `sha256` (text, not null) - key of the blob in the content-addressed store
+      - `size_bytes` (bigint, not null)
+      - `content_type` (text, not null)
+      - `filename` (text, not null)
+      - `uploaded_by` (uuid, foreign key to users, nullable)
+      - `created_at` (timestamptz, default now())
+
+  2. Indexes
+    - `(medical_record_id, created_at)` serves per-record listings
+    - `sha256` finds every row pointing at a blob
+    - Unique `(medical_record_id, sha256)` makes re-uploads idempotent
+*/
+
+CREATE TABLE IF NOT EXISTS medical_record_attachments (
+  id serial PRIMARY KEY,
+  medical_record_id integer NOT NULL REFERENCES medical_records(id) ON DELETE CASCADE,
+  sha256 text NOT NULL CHECK (length(sha256) = 64),
+  size_bytes bigint NOT NULL CHECK (size_bytes > 0),
+  content_type text NOT NULL,
+  filename text NOT NULL,
+  uploaded_by uuid REFERENCES users(id) ON DELETE SET NULL,
+  created_at timestamptz DEFAULT now(),
+  CONSTRAINT uq_attachment_record_sha256 UNIQUE (medical_record_id, sha256)
+);
+
+CREATE INDEX IF NOT EXISTS idx_attachments_record_created
+  ON medical_record_attachments (medical_record_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_attachments_sha256
+  ON medical_record_attachments (sha256);
+
+ALTER TABLE medical_record_attachments ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view attachments of records they can see"
+  ON medical_record_attachments FOR SELECT
+  USING (true);
+
+CREATE POLICY "Doctors can add attachments"
+  ON medical_record_attachments FOR INSERT
+  WITH CHECK (true);
@@ -0,0 +1,16 @@
+/*
+  # Idempotent medical record imports
+
+  1. Changes
+    - `medical_records.idempotency_key` (text, nullable) - supplied by the
+      importer, or derived from the content of the imported line
+
+  2. Constraints
+    - Unique `(doctor_id, idempotency_key)`; NULL keys (records created one
+      at a time) never conflict
+*/
+
+ALTER TABLE medical_records ADD COLUMN IF NOT EXISTS idempotency_key text;
+
+ALTER TABLE medical_records
+  ADD CONSTRAINT uq_medical_records_doctor_idempotency_key UNIQUE (doctor_id, idempotency_key);
@@ -0,0 +1,34 @@
+/*
+  # Idempotency keys
+
+  1. New Tables
+    - `idempotency_keys`
+      - `key` (varchar(64), primary key) - SHA-256 of the caller's credentials
+        and the client-supplied Idempotency-Key header
+      - `fingerprint` (varchar(64)) - SHA-256 of method, path and body; a
+        reused key with a different request is rejected
+      - `status_code` (integer, nullable) - NULL while the first request runs
+      - `headers` (jsonb) / `body` (bytea) - stored response to replay
+      - `created_at` (timestamp)
+      - `expires_at` (timestamp) - short while in progress, then the TTL
+
+  2. Notes
+    - Only used with IDEMPOTENCY_BACKEND=database. Expired rows are
+      reclaimed on conflict and purged periodically by the API.
+    - RLS is on with no policies: stored responses may contain personal
+      data and only the API's own connection reads them.
+*/
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  key varchar(64) PRIMARY KEY,
+  fingerprint varchar(64) NOT NULL,
+  status_code integer,
+  headers jsonb,
+  body bytea,
+  created_at timestamp DEFAULT now(),
+  expires_at timestamp NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,35 @@
+/*
+  # Composite indexes for hot query paths
+
+  The core migration only indexes single columns, but the busiest queries
+  filter on one column and order by others. These are the plans
+  scripts/query_plan_audit.py flags on a seeded database.
+
+  1. New Indexes
+    - `availability (doctor_id, day_of_week)` - a doctor's weekly hours,
+      public and own view, and slot generation
+    - `appointments (patient_id, date DESC, time DESC)` - patient's
+      "my appointments", already in display order
+    - `appointments (doctor_id, date DESC, time DESC)` - doctor's
+      "my appointments"
+    - `medical_records (patient_id, date DESC)` - patient's records
+
+  2. Notes
+    - Booking conflicts are answered by the GiST index behind the
+      `(doctor_id, slot)` exclusion constraint, so no btree is added for
+      `(doctor_id, date, time, status)`.
+    - The single-column indexes stay for now; drop them once the plans
+      above are confirmed in production.
+*/
+
+CREATE INDEX IF NOT EXISTS idx_availability_doctor_day
+  ON availability (doctor_id, day_of_week);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_date_time
+  ON appointments (patient_id, date DESC, time DESC);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date_time
+  ON appointments (doctor_id, date DESC, time DESC);
+
+CREATE INDEX IF NOT EXISTS idx_medical_records_patient_date
+  ON medical_records (patient_id, date DESC);
@@ -0,0 +1,19 @@
+/*
+  # Indexes for the doctor's patient roster
+
+  1. New Indexes
+    - `appointments (doctor_id, patient_id, date) INCLUDE (status)` - the
+      per-patient aggregates for one doctor come from an index-only scan
+      already grouped by patient
+    - `medical_records (doctor_id, patient_id)` - record counts per patient
+
+  2. Notes
+    - Supersedes `idx_appointments_doctor_id` for every query that filters
+      on doctor_id; that index is left in place for now.
+*/
+
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_patient_date
+  ON appointments (doctor_id, patient_id, date) INCLUDE (status);
+
+CREATE INDEX IF NOT EXISTS idx_medical_records_doctor_patient
+  ON medical_records (doctor_id, patient_id);
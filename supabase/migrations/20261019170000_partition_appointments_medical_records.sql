@@ -0,0 +1,371 @@
+/*
+  # Monthly partitioning of appointments and medical_records, with cold archival
+
+  1. Changes
+    - `appointments` and `medical_records` are rebuilt as tables
+      range-partitioned by month on `date`. Rows, ids and id sequences are
+      carried over unchanged.
+    - The primary keys become `(id, date)`. The shared sequences keep `id`
+      unique on its own.
+    - `uq_medical_records_doctor_idempotency_key` becomes
+      `(doctor_id, idempotency_key, date)`, because unique constraints on a
+      partitioned table must include the partition key. Content-derived keys
+      already cover the record's date.
+    - The `appointments_no_overlap` exclusion constraint now exists once per
+      partition. Appointments never span midnight, so two appointments that
+      overlap always share a partition.
+    - New index `medical_records (appointment_id)`
+
+  2. Partitioning
+    - `create_monthly_partition(parent, month)` creates one month of either
+      table, with row level security and, for appointments, the overlap
+      constraint
+    - Partitions cover the month of the oldest existing row through twelve
+      months ahead. A default partition catches anything outside them.
+    - scripts/maintain_partitions.py keeps the months ahead created
+
+  3. Archival
+    - `archive_partition(parent, month)` rewrites one past month into the
+      `archive` schema and swaps it in for the hot partition. The archived
+      copy is written in patient order, with lz4 TOAST compression, a low
+      TOAST threshold and no free space.
+    - Archived months stay attached, so every read path still sees them
+    - An appointment month is only archived once every appointment in it is
+      completed or cancelled; archived appointments are held to those states
+      by a check constraint
+
+  4. Notes
+    - A foreign key may only reference a partitioned table through a unique
+      key that includes the partition key. `medical_records.appointment_id`
+      and `medical_record_attachments.medical_record_id` are therefore
+      enforced by triggers, which keep the ON DELETE SET NULL / CASCADE
+      behaviour.
+    - Run in a maintenance window: the copy holds exclusive locks on both
+      tables.
+*/
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+-- The sequences would otherwise be dropped with the old tables
+ALTER SEQUENCE appointments_id_seq OWNED BY NONE;
+ALTER SEQUENCE medical_records_id_seq OWNED BY NONE;
+
+ALTER TABLE medical_record_attachments
+  DROP CONSTRAINT IF EXISTS medical_record_attachments_medical_record_id_fkey;
+
+ALTER TABLE medical_records RENAME TO medical_records_unpartitioned;
+ALTER TABLE medical_records_unpartitioned RENAME CONSTRAINT medical_records_pkey TO medical_records_unpartitioned_pkey;
+ALTER TABLE medical_records_unpartitioned
+  RENAME CONSTRAINT uq_medical_records_doctor_idempotency_key TO uq_medical_records_unpartitioned_idempotency_key;
+
+ALTER TABLE appointments RENAME TO appointments_unpartitioned;
+ALTER TABLE appointments_unpartitioned RENAME CONSTRAINT appointments_pkey TO appointments_unpartitioned_pkey;
+
+CREATE TABLE appointments (
+  id integer NOT NULL DEFAULT nextval('appointments_id_seq'),
+  patient_id uuid NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+  doctor_id uuid NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+  date date NOT NULL,
+  time time NOT NULL,
+  status text NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'confirmed', 'completed', 'cancelled')),
+  reason text NOT NULL,
+  notes text,
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now(),
+  duration_minutes integer NOT NULL DEFAULT 30 CHECK (duration_minutes > 0),
+  slot tsrange GENERATED ALWAYS AS (tsrange(date + time, date + time + duration_minutes * interval '1 minute')) STORED,
+  PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE medical_records (
+  id integer NOT NULL DEFAULT nextval('medical_records_id_seq'),
+  patient_id uuid NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+  doctor_id uuid NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+  appointment_id integer,
+  title text NOT NULL,
+  diagnosis text NOT NULL,
+  treatment text NOT NULL,
+  prescription text,
+  notes text,
+  date date NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now(),
+  idempotency_key text,
+  PRIMARY KEY (id, date),
+  CONSTRAINT uq_medical_records_doctor_idempotency_key UNIQUE (doctor_id, idempotency_key, date)
+) PARTITION BY RANGE (date);
+
+CREATE OR REPLACE FUNCTION add_appointment_overlap_constraint(partition_name text)
+RETURNS void AS $$
+BEGIN
+  EXECUTE format(
+    'ALTER TABLE public.%I ADD CONSTRAINT %I EXCLUDE USING gist (doctor_id WITH =, slot WITH &&)'
+    ' WHERE (status IN (''pending'', ''confirmed''))',
+    partition_name, partition_name || '_no_overlap'
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent text, month date)
+RETURNS void AS $$
+DECLARE
+  start_date date := date_trunc('month', month)::date;
+  end_date date := (date_trunc('month', month) + interval '1 month')::date;
+  partition_name text := parent || '_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+  IF parent NOT IN ('appointments', 'medical_records') THEN
+    RAISE EXCEPTION '% is not partitioned by month', parent;
+  END IF;
+  -- Already there, hot or archived
+  IF to_regclass(format('public.%I', partition_name)) IS NOT NULL
+     OR to_regclass(format('archive.%I', partition_name)) IS NOT NULL THEN
+    RETURN;
+  END IF;
+
+  EXECUTE format(
+    'CREATE TABLE public.%I PARTITION OF public.%I FOR VALUES FROM (%L) TO (%L)',
+    partition_name, parent, start_date, end_date
+  );
+  -- Policies live on the parent; nothing may read a partition directly
+  EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+  IF parent = 'appointments' THEN
+    PERFORM add_appointment_overlap_constraint(partition_name);
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS appointments_default PARTITION OF appointments DEFAULT;
+ALTER TABLE appointments_default ENABLE ROW LEVEL SECURITY;
+SELECT add_appointment_overlap_constraint('appointments_default');
+
+CREATE TABLE IF NOT EXISTS medical_records_default PARTITION OF medical_records DEFAULT;
+ALTER TABLE medical_records_default ENABLE ROW LEVEL SECURITY;
+
+DO $$
+DECLARE
+  first_month date;
+  month date;
+BEGIN
+  SELECT date_trunc('month', least(
+    (SELECT min(date) FROM appointments_unpartitioned),
+    (SELECT min(date) FROM medical_records_unpartitioned),
+    now()::date
+  ))::date INTO first_month;
+
+  FOR month IN
+    SELECT generate_series(first_month, date_trunc('month', now()) + interval '12 months', interval '1 month')::date
+  LOOP
+    PERFORM create_monthly_partition('appointments', month);
+    PERFORM create_monthly_partition('medical_records', month);
+  END LOOP;
+END;
+$$;
+
+INSERT INTO appointments (
+  id, patient_id, doctor_id, date, time, status, reason, notes, created_at, updated_at, duration_minutes
+)
+SELECT id, patient_id, doctor_id, date, time, status, reason, notes, created_at, updated_at, duration_minutes
+FROM appointments_unpartitioned;
+
+INSERT INTO medical_records (
+  id, patient_id, doctor_id, appointment_id, title, diagnosis, treatment, prescription, notes, date,
+  created_at, updated_at, idempotency_key
+)
+SELECT id, patient_id, doctor_id, appointment_id, title, diagnosis, treatment, prescription, notes, date,
+  created_at, updated_at, idempotency_key
+FROM medical_records_unpartitioned;
+
+DROP TABLE medical_records_unpartitioned;
+DROP TABLE appointments_unpartitioned;
+
+ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id;
+ALTER SEQUENCE medical_records_id_seq OWNED BY medical_records.id;
+
+-- Indexes, recreated on the partitioned tables (and so on every partition)
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_id ON appointments(patient_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_id ON appointments(doctor_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(date);
+CREATE INDEX IF NOT EXISTS idx_appointments_status ON appointments(status);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_date_time
+  ON appointments (patient_id, date DESC, time DESC);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date_time
+  ON appointments (doctor_id, date DESC, time DESC);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_patient_date
+  ON appointments (doctor_id, patient_id, date) INCLUDE (status);
+
+CREATE INDEX IF NOT EXISTS idx_medical_records_patient_id ON medical_records(patient_id);
+CREATE INDEX IF NOT EXISTS idx_medical_records_doctor_id ON medical_records(doctor_id);
+CREATE INDEX IF NOT EXISTS idx_medical_records_date ON medical_records(date);
+CREATE INDEX IF NOT EXISTS idx_medical_records_patient_date
+  ON medical_records (patient_id, date DESC);
+CREATE INDEX IF NOT EXISTS idx_medical_records_doctor_patient
+  ON medical_records (doctor_id, patient_id);
+CREATE INDEX IF NOT EXISTS idx_medical_records_appointment_id
+  ON medical_records (appointment_id);
+
+-- Foreign keys into the partitioned tables, as triggers
+CREATE OR REPLACE FUNCTION medical_records_check_appointment()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.appointment_id IS NOT NULL THEN
+    PERFORM 1 FROM appointments WHERE id = NEW.appointment_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+      RAISE foreign_key_violation USING MESSAGE = format('appointment %s does not exist', NEW.appointment_id);
+    END IF;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER medical_records_appointment_fk BEFORE INSERT OR UPDATE OF appointment_id ON medical_records
+  FOR EACH ROW EXECUTE FUNCTION medical_records_check_appointment();
+
+CREATE OR REPLACE FUNCTION appointments_detach_medical_records()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE medical_records SET appointment_id = NULL WHERE appointment_id = OLD.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER appointments_medical_records_set_null AFTER DELETE ON appointments
+  FOR EACH ROW EXECUTE FUNCTION appointments_detach_medical_records();
+
+CREATE OR REPLACE FUNCTION attachments_check_medical_record()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM 1 FROM medical_records WHERE id = NEW.medical_record_id FOR KEY SHARE;
+  IF NOT FOUND THEN
+    RAISE foreign_key_violation USING MESSAGE = format('medical record %s does not exist', NEW.medical_record_id);
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER medical_record_attachments_record_fk
+  BEFORE INSERT OR UPDATE OF medical_record_id ON medical_record_attachments
+  FOR EACH ROW EXECUTE FUNCTION attachments_check_medical_record();
+
+CREATE OR REPLACE FUNCTION medical_records_delete_attachments()
+RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM medical_record_attachments WHERE medical_record_id = OLD.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER medical_records_attachments_cascade AFTER DELETE ON medical_records
+  FOR EACH ROW EXECUTE FUNCTION medical_records_delete_attachments();
+
+CREATE TRIGGER update_appointments_updated_at BEFORE UPDATE ON appointments
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_medical_records_updated_at BEFORE UPDATE ON medical_records
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Archival
+CREATE OR REPLACE FUNCTION archive_partition(parent text, month date)
+RETURNS bigint AS $$
+DECLARE
+  start_date date := date_trunc('month', month)::date;
+  end_date date := (date_trunc('month', month) + interval '1 month')::date;
+  partition_name text := parent || '_' || to_char(start_date, 'YYYY_MM');
+  column_list text;
+  text_column name;
+  has_active boolean;
+  moved bigint;
+BEGIN
+  IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+    RETURN 0;  -- already archived, or never created
+  END IF;
+
+  -- Writers wait; readers keep using the hot partition until the swap
+  EXECUTE format('LOCK TABLE public.%I IN SHARE MODE', partition_name);
+
+  IF parent = 'appointments' THEN
+    EXECUTE format(
+      'SELECT EXISTS (SELECT 1 FROM public.%I WHERE status IN (''pending'', ''confirmed''))',
+      partition_name
+    ) INTO has_active;
+    IF has_active THEN
+      RETURN NULL;  -- not settled yet; try again on a later run
+    END IF;
+  END IF;
+
+  SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO column_list
+  FROM pg_attribute
+  WHERE attrelid = format('public.%I', parent)::regclass
+    AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+  EXECUTE format(
+    'CREATE TABLE archive.%I (LIKE public.%I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)'
+    ' WITH (fillfactor = 100, toast_tuple_target = 128)',
+    partition_name, parent
+  );
+  FOR text_column IN
+    SELECT attname FROM pg_attribute
+    WHERE attrelid = format('archive.%I', partition_name)::regclass
+      AND attnum > 0 AND NOT attisdropped AND atttypid = 'text'::regtype
+  LOOP
+    EXECUTE format('ALTER TABLE archive.%I ALTER COLUMN %I SET COMPRESSION lz4', partition_name, text_column);
+  END LOOP;
+
+  -- Patient order: a patient's history for the month sits on few pages
+  EXECUTE format(
+    'INSERT INTO archive.%I (%s) SELECT %s FROM public.%I ORDER BY patient_id, date, id',
+    partition_name, column_list, column_list, partition_name
+  );
+  GET DIAGNOSTICS moved = ROW_COUNT;
+
+  -- Lets ATTACH skip its validation scan
+  EXECUTE format(
+    'ALTER TABLE archive.%I ADD CONSTRAINT %I CHECK (date >= %L AND date < %L)',
+    partition_name, partition_name || '_bounds', start_date, end_date
+  );
+  IF parent = 'appointments' THEN
+    -- No overlap constraint here, so nothing may become active again
+    EXECUTE format(
+      'ALTER TABLE archive.%I ADD CONSTRAINT %I CHECK (status IN (''completed'', ''cancelled''))',
+      partition_name, partition_name || '_settled'
+    );
+  END IF;
+
+  EXECUTE format('ALTER TABLE public.%I DETACH PARTITION public.%I', parent, partition_name);
+  EXECUTE format('DROP TABLE public.%I', partition_name);
+  EXECUTE format(
+    'ALTER TABLE public.%I ATTACH PARTITION archive.%I FOR VALUES FROM (%L) TO (%L)',
+    parent, partition_name, start_date, end_date
+  );
+  EXECUTE format('ALTER TABLE archive.%I ENABLE ROW LEVEL SECURITY', partition_name);
+
+  RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Row Level Security
+ALTER TABLE appointments ENABLE ROW LEVEL SECURITY;
+ALTER TABLE medical_records ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own appointments"
+  ON appointments FOR SELECT
+  USING (true);
+
+CREATE POLICY "Patients can create appointments"
+  ON appointments FOR INSERT
+  WITH CHECK (true);
+
+CREATE POLICY "Users can update their own appointments"
+  ON appointments FOR UPDATE
+  USING (true);
+
+CREATE POLICY "Patients can view their own medical records"
+  ON medical_records FOR SELECT
+  USING (true);
+
+CREATE POLICY "Doctors can create medical records"
+  ON medical_records FOR INSERT
+  WITH CHECK (true);
+
+CREATE POLICY "Doctors can update medical records they created"
+  ON medical_records FOR UPDATE
+  USING (true);
@@ -0,0 +1,68 @@
+/*
+  # Cancellation waitlist
+
+  1. New Tables
+    - `waitlist_entries`
+      - `id` (serial, primary key)
+      - `patient_id` (uuid, foreign key to patients)
+      - `doctor_id` (uuid, foreign key to doctors)
+      - `date` (date) - the day the patient wants
+      - `earliest_time`, `latest_time` (time) - acceptable window
+      - `status` (text) - waiting, offered, booked, expired, withdrawn
+      - `offered_time`, `offered_minutes` (nullable) - the slot held while offered
+      - `offer_expires_at` (timestamp, nullable) - end of the hold
+      - `appointment_id` (integer, nullable) - the booking made from the offer
+      - `created_at`, `updated_at` (timestamp)
+
+  2. Indexes
+    - `(doctor_id, date, created_at, id) WHERE status = 'waiting'` - the
+      queue for a freed slot, read in signup order
+    - `(doctor_id, date) WHERE status = 'offered'` - held slots, checked
+      when booking and listing free slots
+    - `(offer_expires_at) WHERE status = 'offered'` - the expiry sweep
+    - Unique `(patient_id, doctor_id, date)` over waiting and offered
+      entries: one live entry per patient, doctor and day
+
+  3. Notes
+    - `appointment_id` has no foreign key: appointments is partitioned
+      and its key includes `date`
+*/
+
+CREATE TABLE IF NOT EXISTS waitlist_entries (
+  id serial PRIMARY KEY,
+  patient_id uuid NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+  doctor_id uuid NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+  date date NOT NULL,
+  earliest_time time NOT NULL,
+  latest_time time NOT NULL,
+  status text NOT NULL DEFAULT 'waiting'
+    CHECK (status IN ('waiting', 'offered', 'booked', 'expired', 'withdrawn')),
+  offered_time time,
+  offered_minutes integer CHECK (offered_minutes > 0),
+  offer_expires_at timestamp,
+  appointment_id integer,
+  created_at timestamp DEFAULT (now() AT TIME ZONE 'utc'),
+  updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc'),
+  CHECK (earliest_time < latest_time),
+  CHECK (status <> 'offered' OR (offered_time IS NOT NULL AND offered_minutes IS NOT NULL AND offer_expires_at IS NOT NULL))
+);
+
+CREATE INDEX IF NOT EXISTS idx_waitlist_queue
+  ON waitlist_entries (doctor_id, date, created_at, id) WHERE status = 'waiting';
+CREATE INDEX IF NOT EXISTS idx_waitlist_holds
+  ON waitlist_entries (doctor_id, date) WHERE status = 'offered';
+CREATE INDEX IF NOT EXISTS idx_waitlist_offer_expiry
+  ON waitlist_entries (offer_expires_at) WHERE status = 'offered';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_waitlist_one_live_entry
+  ON waitlist_entries (patient_id, doctor_id, date) WHERE status IN ('waiting', 'offered');
+CREATE INDEX IF NOT EXISTS idx_waitlist_patient
+  ON waitlist_entries (patient_id, date);
+
+CREATE TRIGGER update_waitlist_entries_updated_at BEFORE UPDATE ON waitlist_entries
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE waitlist_entries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Patients can manage their own waitlist entries"
+  ON waitlist_entries FOR ALL
+  USING (true);
@@ -0,0 +1,91 @@
+/*
+  # Doctor reviews with incrementally maintained rating stats
+
+  1. New Tables
+    - `reviews`
+      - `id` (serial, primary key)
+      - `appointment_id` (integer, unique) - the completed appointment rated
+      - `doctor_id` (uuid, foreign key to doctors)
+      - `patient_id` (uuid, foreign key to patients)
+      - `rating` (smallint, 1-5)
+      - `comment` (text, nullable)
+      - `created_at`, `updated_at` (timestamp)
+    - `doctor_rating_stats` - one row per doctor
+      - `doctor_id` (uuid, primary key, foreign key to doctors)
+      - `review_count`, `rating_sum` (integer) - running totals, adjusted by
+        the application in the same transaction as each review write
+      - `average_rating` (numeric(3,2), generated) - NULL until reviewed
+      - `updated_at` (timestamp)
+
+  2. Indexes
+    - `doctor_rating_stats (average_rating DESC NULLS LAST, review_count DESC, doctor_id)`
+      and `(review_count DESC, doctor_id)` - search sorted by rating or by
+      review count reads doctors in index order
+    - `reviews (doctor_id, id DESC)` - a doctor's reviews, newest first
+
+  3. Notes
+    - Every doctor gets a stats row (backfilled here, then by trigger on
+      insert), so ranked search can inner-join and stay an index scan
+    - `appointment_id` has no foreign key: appointments is partitioned and
+      its key includes `date`
+*/
+
+CREATE TABLE IF NOT EXISTS reviews (
+  id serial PRIMARY KEY,
+  appointment_id integer UNIQUE NOT NULL,
+  doctor_id uuid NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+  patient_id uuid NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+  rating smallint NOT NULL CHECK (rating BETWEEN 1 AND 5),
+  comment text,
+  created_at timestamp DEFAULT (now() AT TIME ZONE 'utc'),
+  updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX IF NOT EXISTS idx_reviews_doctor_id ON reviews (doctor_id, id DESC);
+
+CREATE TABLE IF NOT EXISTS doctor_rating_stats (
+  doctor_id uuid PRIMARY KEY REFERENCES doctors(id) ON DELETE CASCADE,
+  review_count integer NOT NULL DEFAULT 0 CHECK (review_count >= 0),
+  rating_sum integer NOT NULL DEFAULT 0 CHECK (rating_sum >= 0),
+  average_rating numeric(3, 2)
+    GENERATED ALWAYS AS (CASE WHEN review_count > 0 THEN round(rating_sum::numeric / review_count, 2) END) STORED,
+  updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX IF NOT EXISTS idx_doctor_rating_stats_rank
+  ON doctor_rating_stats (average_rating DESC NULLS LAST, review_count DESC, doctor_id);
+CREATE INDEX IF NOT EXISTS idx_doctor_rating_stats_count
+  ON doctor_rating_stats (review_count DESC, doctor_id);
+
+INSERT INTO doctor_rating_stats (doctor_id)
+SELECT id FROM doctors
+ON CONFLICT (doctor_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION create_doctor_rating_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO doctor_rating_stats (doctor_id) VALUES (NEW.id) ON CONFLICT (doctor_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER doctors_create_rating_stats AFTER INSERT ON doctors
+  FOR EACH ROW EXECUTE FUNCTION create_doctor_rating_stats();
+
+CREATE TRIGGER update_reviews_updated_at BEFORE UPDATE ON reviews
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE reviews ENABLE ROW LEVEL SECURITY;
+ALTER TABLE doctor_rating_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Reviews are publicly readable"
+  ON reviews FOR SELECT
+  USING (true);
+
+CREATE POLICY "Patients can write reviews of their appointments"
+  ON reviews FOR ALL
+  USING (true);
+
+CREATE POLICY "Rating stats are publicly readable"
+  ON doctor_rating_stats FOR SELECT
+  USING (true);
@@ -0,0 +1,29 @@
+/*
+  # Doctor calendar feed
+
+  1. Changes
+    - `doctors.calendar_token_hash` (varchar(64), nullable, unique) - sha256
+      of the doctor's private `.ics` feed token; the token itself is only
+      shown once, when issued
+
+  2. Indexes
+    - `doctors (calendar_token_hash)` - unique; resolves a feed poll
+    - `appointments (doctor_id, date) INCLUDE (updated_at, patient_id)` -
+      the count and latest change of a doctor's feed window, and the
+      patients to check for renames, come from an index-only scan, so an
+      unchanged feed is answered 304 without reading appointment rows
+
+  3. Notes
+    - Polls are unauthenticated and identified by token only; rotating the
+      token (POST /doctors/me/calendar-feed) revokes the old URL
+    - Created on the partitioned parent, so each monthly partition gets
+      its own index
+*/
+
+ALTER TABLE doctors ADD COLUMN IF NOT EXISTS calendar_token_hash varchar(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_doctors_calendar_token_hash
+  ON doctors (calendar_token_hash) WHERE calendar_token_hash IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date_updated
+  ON appointments (doctor_id, date) INCLUDE (updated_at, patient_id);
@@ -0,0 +1,40 @@
+/*
+  # Keep dependent rows when a partitioned row changes month
+
+  1. Changes
+    - `appointments_detach_medical_records()` and
+      `medical_records_delete_attachments()` return early when a row with
+      `OLD.id` still exists
+
+  2. Notes
+    - An UPDATE that moves a row to another monthly partition (a date
+      change across months) runs as DELETE + INSERT and fires the AFTER
+      DELETE triggers that stand in for the foreign keys. Without this
+      check, moving a medical record's date detached nothing but deleted
+      all of its attachments, and moving an appointment cleared
+      `medical_records.appointment_id`
+    - AFTER row triggers run once the statement is done, so the moved row
+      is already visible in its new partition
+*/
+
+CREATE OR REPLACE FUNCTION appointments_detach_medical_records()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM appointments WHERE id = OLD.id) THEN
+    RETURN NULL;  -- moved to another partition, not deleted
+  END IF;
+  UPDATE medical_records SET appointment_id = NULL WHERE appointment_id = OLD.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION medical_records_delete_attachments()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM medical_records WHERE id = OLD.id) THEN
+    RETURN NULL;  -- moved to another partition, not deleted
+  END IF;
+  DELETE FROM medical_record_attachments WHERE medical_record_id = OLD.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;